@@ -0,0 +1,148 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ReadApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Котики', slug='cats', description='Про котиков')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='Первый')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_posts_are_paginated_by_cursor(self):
+        ids = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['after'] = cursor
+            data = self.client.get(reverse('api_posts'), params).json()
+            ids += [post['id'] for post in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+
+    def test_posts_filter_by_group(self):
+        data = self.client.get(reverse('api_posts'), {'group': 'cats'}).json()
+        self.assertEqual({post['group'] for post in data['results']},
+                         {'cats'})
+        self.assertEqual(len(data['results']), 2)
+
+    def test_post_detail_and_comments(self):
+        post = self.posts[0]
+        data = self.client.get(reverse('api_post', args=[post.pk])).json()
+        self.assertEqual((data['author'], data['comment_count']),
+                         ('StasBasov', 1))
+        data = self.client.get(reverse('api_comments', args=[post.pk])).json()
+        self.assertEqual([comment['text'] for comment in data['results']],
+                         ['Первый'])
+        response = self.client.get(reverse('api_post', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_and_groups(self):
+        data = self.client.get(
+            reverse('api_profile', args=['StasBasov'])).json()
+        self.assertEqual((data['posts_count'], data['followers_count']),
+                         (5, 1))
+        data = self.client.get(reverse('api_groups')).json()
+        self.assertEqual([group['slug'] for group in data['results']],
+                         ['cats'])
+
+    def test_feed_requires_login(self):
+        response = self.client.get(reverse('api_feed'))
+        self.assertEqual(response.status_code, 401)
+        data = self.reader_client.get(reverse('api_feed')).json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [post.pk for post in reversed(self.posts)])
+
+    @override_settings(WATERMARKS_ENABLED=True)
+    def test_unchanged_response_is_not_modified(self):
+        url = reverse('api_posts')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        post = self.posts[-1]
+        post.text = 'Изменён'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_etag_follows_content(self):
+        url = reverse('api_feed')
+        etag = self.reader_client.get(url)['ETag']
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_ndjson_export_streams_every_object(self):
+        response = self.client.get(reverse('api_posts'),
+                                   {'format': 'ndjson', 'limit': 1})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines],
+                         [post.pk for post in reversed(self.posts)])
+        response = self.reader_client.get(reverse('api_feed'),
+                                          {'format': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+
+
+class FollowBatchApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(3)]
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def post(self, client, data):
+        return client.post(reverse('api_follows'), json.dumps(data),
+                           content_type='application/json')
+
+    def test_batch_follow_and_unfollow(self):
+        response = self.post(self.reader_client, {
+            'follow': ['author1', 'author2', 'reader', 'nobody'],
+            'unfollow': ['author0'],
+        })
+        self.assertEqual(response.json(), {
+            'followed': 2, 'unfollowed': 1, 'unknown': ['nobody']})
+        self.assertEqual(
+            set(Follow.objects.filter(user=self.reader)
+                .values_list('author__username', flat=True)),
+            {'author1', 'author2'})
+        self.reader.stats.refresh_from_db()
+        self.assertEqual(self.reader.stats.following_count, 2)
+
+    def test_batch_follow_requires_login_and_valid_body(self):
+        response = self.post(self.client, {'follow': ['author1']})
+        self.assertEqual(response.status_code, 401)
+        response = self.post(self.reader_client, {'follow': 'author1'})
+        self.assertEqual(response.status_code, 400)
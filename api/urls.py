@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('posts/', views.posts, name='api_posts'),
+    path('posts/<int:post_id>/', views.post_detail, name='api_post'),
+    path('posts/<int:post_id>/comments/', views.comments,
+         name='api_comments'),
+    path('groups/', views.groups, name='api_groups'),
+    path('groups/<slug:slug>/', views.group_detail, name='api_group'),
+    path('profiles/<str:username>/', views.profile, name='api_profile'),
+    path('feed/', views.feed, name='api_feed'),
+    path('follows/', views.follow_batch, name='api_follows'),
+]
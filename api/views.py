@@ -0,0 +1,289 @@
+"""API постов, групп, профилей, комментариев и ленты.
+
+Всё, кроме пакетной подписки ``follow_batch``, только читает данные.
+Объекты сериализуются из ``.values()``, без создания экземпляров
+моделей. Списки листаются курсором ``?after=`` (размер страницы —
+``?limit=``). ``ETag`` и ``Last-Modified`` берутся из водяных знаков
+(``posts.watermarks``), поэтому 304 отвечается до запросов к базе;
+только личная лента хеширует готовый ответ. С ``?format=ndjson`` список
+отдаётся целиком потоком по строке JSON на объект: строки читаются
+``.iterator()`` пачками, поэтому память не растёт с размером выгрузки.
+"""
+import json
+from hashlib import md5
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (Http404, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET, require_POST
+
+from posts import follows, stats, timeline
+from posts.models import Comment, Group, Post, User
+from posts.pagination import encode_cursor, keyset_slice
+from posts.watermarks import conditional
+
+# Имя поля в ответе -> путь в .values()
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comment_count': 'comment_count',
+    'version': 'version',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+GROUP_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+}
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def _serializer(fields):
+    def serialize(row):
+        data = {name: row[lookup] for name, lookup in fields.items()}
+        if data.get('image'):
+            data['image'] = default_storage.url(data['image'])
+        elif 'image' in data:
+            data['image'] = None
+        return data
+    return serialize
+
+
+serialize_post = _serializer(POST_FIELDS)
+serialize_comment = _serializer(COMMENT_FIELDS)
+serialize_group = _serializer(GROUP_FIELDS)
+
+
+def _json(data):
+    return HttpResponse(_dumps(data), content_type='application/json')
+
+
+def _respond(request, data):
+    """JSON-ответ с ``ETag`` по содержимому или 304, если он не изменился."""
+    content = _dumps(data)
+    etag = quote_etag(md5(content.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+def _export(rows, serialize):
+    lines = (_dumps(serialize(row)) + '\n' for row in rows)
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        size = settings.API_PAGE_SIZE
+    return min(max(size, 1), settings.API_MAX_PAGE_SIZE)
+
+
+def _page(request, queryset, date_field, pk_field='id'):
+    """Страница строк после курсора ``?after=`` и курсор следующей."""
+    per_page = _page_size(request)
+    rows, number = keyset_slice(queryset, request.GET.get('after'),
+                                per_page + 1, date_field=date_field,
+                                pk_field=pk_field)
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(
+            rows[-1][date_field], rows[-1][pk_field], number)
+    return rows, next_cursor
+
+
+def _list(request, queryset, fields, serialize, date_field):
+    rows = queryset.values(*fields.values())
+    if request.GET.get('format') == 'ndjson':
+        return _export(rows.order_by(f'-{date_field}', '-id').iterator(
+            chunk_size=settings.API_EXPORT_CHUNK_SIZE), serialize)
+    rows, next_cursor = _page(request, rows, date_field)
+    return _json({
+        'results': [serialize(row) for row in rows],
+        'next': next_cursor,
+    })
+
+
+def _posts_scopes(request):
+    # В постах есть slug группы, поэтому нужны и названия групп.
+    if request.GET.get('author'):
+        return ['groups', f'author:{request.GET["author"]}']
+    if request.GET.get('group'):
+        return ['groups', f'group:{request.GET["group"]}']
+    return ['groups', 'all']
+
+
+def _post_scopes(request, post_id):
+    return ['groups', f'post:{post_id}']
+
+
+def _groups_scopes(request, slug=None):
+    return ['groups'] if slug is None else ['groups', f'group:{slug}']
+
+
+def _profile_scopes(request, username):
+    return [f'author:{username}']
+
+
+@require_GET
+@conditional(_posts_scopes, per_viewer=False)
+def posts(request):
+    queryset = Post.objects.all()
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    return _list(request, queryset, POST_FIELDS, serialize_post, 'pub_date')
+
+
+@require_GET
+@conditional(_post_scopes, per_viewer=False)
+def post_detail(request, post_id):
+    row = Post.objects.filter(pk=post_id).values(
+        *POST_FIELDS.values()).first()
+    if row is None:
+        raise Http404
+    return _json(serialize_post(row))
+
+
+@require_GET
+@conditional(_post_scopes, per_viewer=False)
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return _list(request, Comment.objects.filter(post_id=post_id),
+                 COMMENT_FIELDS, serialize_comment, 'created')
+
+
+@require_GET
+@conditional(_groups_scopes, per_viewer=False)
+def groups(request):
+    rows = Group.objects.order_by('title').values(*GROUP_FIELDS.values())
+    if request.GET.get('format') == 'ndjson':
+        return _export(rows.iterator(), serialize_group)
+    return _json({
+        'results': [serialize_group(row) for row in rows],
+    })
+
+
+@require_GET
+@conditional(_groups_scopes, per_viewer=False)
+def group_detail(request, slug):
+    row = Group.objects.filter(slug=slug).values(
+        *GROUP_FIELDS.values()).first()
+    if row is None:
+        raise Http404
+    return _json(serialize_group(row))
+
+
+@require_GET
+@conditional(_profile_scopes, per_viewer=False)
+def profile(request, username):
+    user = get_object_or_404(User.objects.select_related('stats'),
+                             username=username)
+    user_stats = stats.for_user(user)
+    return _json({
+        'username': user.username,
+        'full_name': user.get_full_name(),
+        'posts_count': user_stats.posts_count,
+        'followers_count': user_stats.followers_count,
+        'following_count': user_stats.following_count,
+    })
+
+
+def _with_posts(entries):
+    """Заменить строки ленты строками постов, сохранив порядок."""
+    post_ids = [entry['post_id'] for entry in entries]
+    posts = {row['id']: row for row in Post.objects.filter(
+        pk__in=post_ids).values(*POST_FIELDS.values())}
+    return [posts[pk] for pk in post_ids if pk in posts]
+
+
+def _exported_feed(entries):
+    entries = entries.iterator(chunk_size=settings.API_EXPORT_CHUNK_SIZE)
+    while True:
+        chunk = list(islice(entries, settings.API_EXPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield from _with_posts(chunk)
+
+
+@require_GET
+def feed(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Требуется авторизация'}, status=401)
+    entries = timeline.entries(request.user).values('pub_date', 'post_id')
+    if request.GET.get('format') == 'ndjson':
+        return _export(_exported_feed(entries.order_by(
+            '-pub_date', '-post_id')), serialize_post)
+    entries, next_cursor = _page(request, entries, 'pub_date',
+                                 pk_field='post_id')
+    return _respond(request, {
+        'results': [serialize_post(row) for row in _with_posts(entries)],
+        'next': next_cursor,
+    })
+
+
+def _usernames(data, key):
+    names = data.get(key, [])
+    if not isinstance(names, list) or not all(
+            isinstance(name, str) for name in names):
+        raise ValueError(key)
+    return names
+
+
+@require_POST
+def follow_batch(request):
+    """Подписаться и отписаться сразу от многих авторов.
+
+    Тело — JSON ``{"follow": [имена], "unfollow": [имена]}``, всего не
+    больше ``API_FOLLOW_BATCH_LIMIT`` имён.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Требуется авторизация'}, status=401)
+    try:
+        data = json.loads(request.body)
+        follow = _usernames(data, 'follow')
+        unfollow = _usernames(data, 'unfollow')
+    except (AttributeError, ValueError):
+        return JsonResponse({'detail': 'Ожидаются списки имён '
+                             '"follow" и "unfollow"'}, status=400)
+    if len(follow) + len(unfollow) > settings.API_FOLLOW_BATCH_LIMIT:
+        return JsonResponse({'detail': 'Не больше '
+                             f'{settings.API_FOLLOW_BATCH_LIMIT} имён'},
+                            status=400)
+    ids = dict(User.objects.filter(
+        username__in=follow + unfollow).values_list('username', 'pk'))
+    user_id = request.user.pk
+    return JsonResponse({
+        'followed': follows.follow_many(
+            (user_id, ids[name]) for name in follow if name in ids),
+        'unfollowed': follows.unfollow_many(
+            (user_id, ids[name]) for name in unfollow if name in ids),
+        'unknown': sorted(set(follow + unfollow) - set(ids)),
+    })
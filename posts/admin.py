@@ -1,14 +1,30 @@
 from django.contrib import admin
+from django.utils import timezone
 
+from . import fulltext
 from .models import Post
 from .models import Group
 from .models import Comment
 from .models import Follow
+from .models import Task
 
 
-class PostAdmin(admin.ModelAdmin):
+class FullTextSearchMixin:
+    """Поиск в админке через полнотекстовый индекс вместо LIKE."""
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return super().get_search_results(
+                request, queryset, search_term)
+        ids = fulltext.matching_ids(self.search_kind, search_term)
+        return queryset.filter(pk__in=ids), False
+
+
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ("pk", "text", "pub_date", "author", "group")
     search_fields = ("text",)
+    search_kind = "post"
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
@@ -20,9 +36,10 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ("pk", "text", "created", "author")
     search_fields = ("text",)
+    search_kind = "comment"
     empty_value_display = "-пусто-"
 
 
@@ -32,7 +49,25 @@ class FollowAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "status", "attempts", "run_after",
+                    "created", "finished")
+    list_filter = ("status", "name")
+    search_fields = ("name", "args")
+    readonly_fields = ("name", "args", "attempts", "locked_at", "finished",
+                       "last_error", "created")
+    actions = ("retry",)
+    empty_value_display = "-пусто-"
+
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status=Task.RUNNING).update(
+            status=Task.PENDING, attempts=0, run_after=timezone.now())
+        self.message_user(request, f"Поставлено в очередь заново: {updated}")
+    retry.short_description = "Повторить выбранные задачи"
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,229 @@
+"""Нагрузочный стенд для view приложения posts.
+
+``seed`` наполняет базу реалистичными данными: подписки распределены
+по степенному закону (у немногих авторов большинство подписчиков),
+у части постов есть картинки и комментарии. ``run`` прогоняет
+запросы к каждой view через тестовый клиент и меряет задержку
+(p50/p99), число SQL-запросов и пик памяти на запрос.
+
+Оба шага вызываются командами ``seed_bench`` и ``bench``.
+"""
+import io
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import fulltext, stats, timeline
+from .models import Comment, Follow, Group, Post, User
+from .profiling import percentile
+
+USER_PREFIX = 'bench_user_'
+GROUP_PREFIX = 'bench-group-'
+BATCH_SIZE = 1000
+
+
+def _image_files(count, rng):
+    files = []
+    for i in range(count):
+        buffer = io.BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+        files.append(ContentFile(buffer.getvalue(), name=f'bench_{i}.jpg'))
+    return files
+
+
+def _power_law_authors(rng, user_ids, degree, alpha):
+    """Выбрать ``degree`` авторов: вес автора i пропорционален 1/i^alpha."""
+    weights = [1 / (rank + 1) ** alpha for rank in range(len(user_ids))]
+    return set(rng.choices(user_ids, weights=weights, k=degree))
+
+
+def seed(users=100, posts=1000, groups=10, comments=2000, images=50,
+         follows_per_user=20, alpha=1.2, days=365, seed=0):
+    """Наполнить базу данными и вернуть итоговые количества объектов."""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    User.objects.bulk_create(
+        [User(username=f'{USER_PREFIX}{i}') for i in range(users)],
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+    user_ids = list(User.objects.filter(
+        username__startswith=USER_PREFIX).values_list('pk', flat=True))
+    Group.objects.bulk_create(
+        [Group(title=f'Группа {i}', slug=f'{GROUP_PREFIX}{i}',
+               description='Сообщество для нагрузочного теста')
+         for i in range(groups)],
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+    group_ids = list(Group.objects.filter(
+        slug__startswith=GROUP_PREFIX).values_list('pk', flat=True))
+
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)
+         for user_id in user_ids
+         for author_id in _power_law_authors(
+             rng, user_ids, int(rng.paretovariate(1.5) * follows_per_user / 3),
+             alpha)
+         if author_id != user_id],
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    # Авторы постов тоже распределены по степенному закону.
+    author_weights = [1 / (rank + 1) ** alpha for rank in range(users)]
+    last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+    Post.objects.bulk_create(
+        [Post(text=f'Пост {i} для нагрузочного теста ' * rng.randint(1, 20),
+              author_id=rng.choices(user_ids, weights=author_weights)[0],
+              group_id=rng.choice(group_ids + [None]))
+         for i in range(posts)],
+        batch_size=BATCH_SIZE)
+    # В SQLite bulk_create не возвращает pk: перечитываем новые строки.
+    new_posts = list(Post.objects.filter(pk__gt=last_pk).only('pk'))
+    for post in new_posts:
+        post.pub_date = now - timedelta(seconds=rng.randrange(days * 86400))
+    Post.objects.bulk_update(new_posts, ['pub_date'], batch_size=BATCH_SIZE)
+
+    if new_posts and images:
+        for image, post in zip(_image_files(images, rng),
+                               rng.sample(new_posts, min(images, posts))):
+            post.image.save(image.name, image, save=False)
+            Post.objects.filter(pk=post.pk).update(image=post.image.name)
+
+    if new_posts:
+        post_weights = [1 / (rank + 1) ** alpha
+                        for rank in range(len(new_posts))]
+        post_ids = [post.pk for post in new_posts]
+        Comment.objects.bulk_create(
+            [Comment(post_id=rng.choices(post_ids, weights=post_weights)[0],
+                     author_id=rng.choice(user_ids),
+                     text=f'Комментарий {i}')
+             for i in range(comments)],
+            batch_size=BATCH_SIZE)
+
+    _rebuild_derived_data(user_ids)
+    return {
+        'users': User.objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+        'images': Post.objects.exclude(image='').exclude(
+            image__isnull=True).count(),
+    }
+
+
+def _rebuild_derived_data(user_ids):
+    """bulk_create не шлёт сигналов: пересчитать производные данные."""
+    counts = Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+        'post').annotate(total=Count('pk')).values('total')
+    Post.objects.update(comment_count=Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0))
+    for user_id in user_ids:
+        timeline.rebuild(user_id)
+    stats.reconcile(User.objects.filter(pk__in=user_ids))
+    fulltext.rebuild()
+
+
+def _scenarios():
+    """Сценарии: (имя, метод, URL, данные, пользователь или None)."""
+    top_author = User.objects.select_related('stats').order_by(
+        '-stats__followers_count').first()
+    top_reader = User.objects.select_related('stats').order_by(
+        '-stats__following_count').first()
+    top_group = Group.objects.annotate(total=Count('posts')).order_by(
+        '-total').first()
+    top_post = Post.objects.select_related('author').order_by(
+        '-comment_count').first()
+    if None in (top_author, top_reader, top_group, top_post):
+        raise ValueError('В базе нет данных: сначала запустите seed_bench')
+    post_url = [top_post.author.username, top_post.pk]
+    return [
+        ('index', 'get', reverse('index'), None, None),
+        ('group_posts', 'get',
+         reverse('group_posts', args=[top_group.slug]), None, None),
+        ('profile', 'get',
+         reverse('profile', args=[top_author.username]), None, None),
+        ('post_view', 'get', reverse('post', args=post_url), None, None),
+        ('follow_index', 'get', reverse('follow_index'), None, top_reader),
+        ('add_comment', 'post', reverse('add_comment', args=post_url),
+         {'text': 'Комментарий из бенчмарка'}, top_reader),
+        ('new_post', 'post', reverse('new_post'),
+         {'text': 'Пост из бенчмарка'}, top_reader),
+    ]
+
+
+def _measure(client, method, url, data):
+    """Один запрос: (мс, число запросов, пик памяти в КиБ, статус)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url, data)
+    elapsed = (time.perf_counter() - started) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return elapsed, len(queries), peak, response.status_code
+
+
+def run(requests=50, warmup=5, views=None, cold=False):
+    """Прогнать сценарии и вернуть результаты для сохранения в JSON.
+
+    Записи (комментарий, пост) выполняются в транзакции, которая
+    откатывается, поэтому повторные прогоны идут на тех же данных.
+    """
+    results = {}
+    for name, method, url, data, user in _scenarios():
+        if views and name not in views:
+            continue
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        samples = []
+        for iteration in range(warmup + requests):
+            if cold:
+                cache.clear()
+            with transaction.atomic():
+                sample = _measure(client, method, url, data)
+                transaction.set_rollback(method != 'get')
+            if iteration >= warmup:
+                samples.append(sample)
+        latency, queries, memory, statuses = zip(*samples)
+        results[name] = {
+            'url': url,
+            'requests': requests,
+            'status': sorted(set(statuses)),
+            'latency_ms': {
+                'p50': percentile(latency, 50),
+                'p99': percentile(latency, 99),
+                'mean': sum(latency) / len(latency),
+            },
+            'queries': {
+                'p50': percentile(queries, 50),
+                'max': max(queries),
+            },
+            'memory_peak_kib': {
+                'p50': percentile(memory, 50),
+                'max': max(memory),
+            },
+        }
+    return results
+
+
+def revision():
+    """Текущий коммит git, чтобы сравнивать прогоны между коммитами."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
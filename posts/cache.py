@@ -0,0 +1,222 @@
+"""Кэш приложения posts с защитой от одновременного пересчёта.
+
+Работает поверх любого бэкенда Django из ``settings.CACHES``
+(алиас ``POSTS_CACHE_ALIAS``): локально это может быть файловый кэш
+или таблица SQLite, в продакшене — memcached или redis.
+
+Значение хранится вместе с «мягким» сроком жизни. После него запись
+ещё ``stale_timeout`` секунд отдаётся как устаревшая, пока один
+процесс, взявший блокировку через атомарный ``cache.add``, пересчитывает
+её — в фоновом потоке, если включён ``POSTS_CACHE_BACKGROUND_REFRESH``,
+так что запрос, заметивший устаревание, его не ждёт. Внутри процесса
+одновременные запросы одного ключа ждут первого (request coalescing),
+а не считают значение каждый сам.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.http import HttpResponse
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+
+def is_shared():
+    """Общий ли кэш для всех процессов (не память процесса, не заглушка)."""
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def _count(event):
+    with _metrics_lock:
+        _metrics[event] += 1
+    profiling.count(event)
+
+
+def metrics():
+    """Счётчики попаданий и промахов текущего процесса."""
+    with _metrics_lock:
+        data = dict(_metrics)
+    lookups = sum(data.get(name, 0) for name in ('hit', 'stale', 'miss'))
+    hits = data.get('hit', 0) + data.get('stale', 0)
+    data['hit_ratio'] = hits / lookups if lookups else None
+    return data
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def _recompute(cache, key, compute, timeout, stale_timeout):
+    value = compute()
+    cache.set(key, (value, time.time() + timeout), timeout + stale_timeout)
+    _count('recompute')
+    return value
+
+
+def _locked_recompute(cache, key, compute, timeout, stale_timeout):
+    """Пересчитать значение, если удалось взять блокировку.
+
+    Возвращает ``(True, value)`` или ``(False, None)``, если значение
+    уже пересчитывает другой процесс.
+    """
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, settings.POSTS_CACHE_LOCK_TIMEOUT):
+        return False, None
+    try:
+        return True, _recompute(cache, key, compute, timeout, stale_timeout)
+    finally:
+        cache.delete(lock_key)
+
+
+def _in_background(func):
+    """Выполнить ``func`` в отдельном потоке; вернуть поток."""
+    def run():
+        try:
+            func()
+        except Exception:
+            logger.exception('Фоновый пересчёт кэша не удался')
+        finally:
+            # У потока свои соединения с базой: закрыть их за собой.
+            connections.close_all()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _coalesced(key, func, wait=True):
+    """Выполнить ``func`` один раз на процесс для одновременных вызовов.
+
+    Остальные вызовы ждут первого (если ``wait``) и получают ``None``.
+    """
+    with _inflight_lock:
+        event = _inflight.get(key)
+        leader = event is None
+        if leader:
+            event = _inflight[key] = threading.Event()
+    if not leader:
+        _count('coalesced')
+        if wait:
+            event.wait(settings.POSTS_CACHE_LOCK_TIMEOUT)
+        return None
+    try:
+        return func()
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        event.set()
+
+
+def get_or_set(key, compute, timeout, stale_timeout=None):
+    """Достать значение по ключу или вычислить его через ``compute()``."""
+    cache = get_cache()
+    if stale_timeout is None:
+        stale_timeout = settings.POSTS_CACHE_STALE_TIMEOUT
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if fresh_until > time.time():
+            _count('hit')
+            return value
+        _count('stale')
+
+        def refresh():
+            _coalesced(key, lambda: _locked_recompute(
+                cache, key, compute, timeout, stale_timeout), wait=False)
+
+        if settings.POSTS_CACHE_BACKGROUND_REFRESH:
+            _in_background(refresh)
+        else:
+            refresh()
+        return value
+
+    _count('miss')
+    result = _coalesced(key, lambda: _locked_recompute(
+        cache, key, compute, timeout, stale_timeout))
+    if result is not None and result[0]:
+        return result[1]
+    # Значение считает другой процесс или поток: ждём его, но не дольше
+    # времени блокировки, после чего считаем сами.
+    deadline = time.time() + settings.POSTS_CACHE_LOCK_TIMEOUT
+    while time.time() < deadline:
+        entry = cache.get(key)
+        if entry is not None:
+            _count('waited')
+            return entry[0]
+        time.sleep(settings.POSTS_CACHE_POLL_INTERVAL)
+    return _recompute(cache, key, compute, timeout, stale_timeout)
+
+
+def _freeze(response):
+    return (response.status_code, list(response.items()),
+            response.content)
+
+
+def _thaw(frozen):
+    status, headers, content = frozen
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+def cached_page(timeout, stale_timeout=None, key_prefix='page'):
+    """Закэшировать GET-ответ view отдельно для каждого пользователя.
+
+    Хранится весь ответ — код, заголовки и тело, кроме cookie. В
+    отличие от ``cache_page`` устаревшая страница продолжает
+    отдаваться, пока её пересобирает один воркер. Под
+    ``watermarks.conditional`` водяные знаки запроса входят в ключ:
+    после правки устаревшая страница не попадёт под новый ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            viewer = request.user.pk if request.user.is_authenticated else 0
+            raw = request.get_full_path()
+            marks = getattr(request, '_watermarks', None)
+            if marks:
+                raw += '|' + '|'.join(repr(value) for value in marks)
+            path = md5(raw.encode()).hexdigest()
+            key = f'{key_prefix}:{viewer}:{path}'
+
+            rendered = []
+
+            def render():
+                response = view(request, *args, **kwargs)
+                rendered.append(response)
+                if response.streaming:
+                    return None
+                return _freeze(response)
+
+            cached = get_or_set(key, render, timeout, stale_timeout)
+            if rendered:
+                return rendered[0]
+            if cached is None:
+                get_cache().delete(key)
+                return view(request, *args, **kwargs)
+            return _thaw(cached)
+        return wrapper
+    return decorator
@@ -0,0 +1,45 @@
+"""Общие страницы для кэша на границе (reverse proxy, CDN).
+
+Для анонимного читателя главная, группа, профиль и пост рендерятся
+одинаковой «оболочкой», в которой нет ничего личного: ссылка на
+редактирование, форма комментария, меню и кнопка подписки лежат в ней
+скрытыми заготовками. Скрипт ``viewer.html`` запрашивает ``viewer``
+(имя, права на посты страницы, подписку, CSRF-токен) и раскрывает их,
+если оболочку из кэша получил вошедший пользователь.
+
+Запрос без cookie сессии не трогает сессию вовсе: ``request.user``
+сразу подменяется анонимным, поэтому ответ не получает
+``Vary: Cookie`` и помечается ``public`` с ``s-maxage`` — прокси может
+отдавать его всем. Браузер же каждый раз перепроверяет страницу по
+``ETag``. Ответы с cookie сессии остаются ``private``.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import patch_cache_control
+
+CACHEABLE_STATUSES = (200, 304)
+
+
+def shell_page(view):
+    """Декоратор view: анонимным — оболочка с заголовками общего кэша.
+
+    Должен быть внешним, раньше всего, что обращается к
+    ``request.user``.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        public = (request.method in ('GET', 'HEAD')
+                  and settings.SESSION_COOKIE_NAME not in request.COOKIES)
+        if public:
+            request.user = AnonymousUser()
+        request.edge_shell = not request.user.is_authenticated
+        response = view(request, *args, **kwargs)
+        if not public:
+            patch_cache_control(response, private=True)
+        elif response.status_code in CACHEABLE_STATUSES:
+            patch_cache_control(response, public=True, max_age=0,
+                                s_maxage=settings.EDGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
@@ -0,0 +1,205 @@
+"""Граф подписок в памяти процесса.
+
+Для каждого пользователя хранятся отсортированные массивы ``array``
+с id авторов, на которых он подписан, и с id его подписчиков. Граф
+загружается одним запросом при первом обращении и общий для всех
+запросов процесса: проверка подписки — двоичный поиск, списки и
+количества — без SQL.
+
+Изменения публикуются через кэш: после коммита сигналы ``Follow``
+увеличивают номер поколения (``cache.incr``) и записывают под этим
+номером саму правку, так что откатанная подписка до графа не доходит.
+Процесс, заметив новое поколение, применяет пропущенные правки, а если
+их слишком много, какая-то уже вытеснена или пропал сам номер — заново
+загружает граф из базы. Правки идемпотентны, поэтому повторное
+применение ничего не ломает.
+
+Без общего для всех процессов кэша правки одного процесса не дошли бы
+до других (и до воркера ``run_tasks``), поэтому граф включается только
+с ним (``FOLLOW_GRAPH_ENABLED``); иначе те же функции читают ``Follow``.
+"""
+import random
+import threading
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import get_cache, is_shared
+from .models import Follow
+
+GENERATION_KEY = 'follow_graph:generation'
+
+_lock = threading.Lock()
+_graph = None
+_generation = None
+
+
+def _change_key(generation):
+    return f'follow_graph:change:{generation}'
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def _insert(index, key, value):
+    ids = index.setdefault(key, array('l'))
+    position = bisect_left(ids, value)
+    if position == len(ids) or ids[position] != value:
+        ids.insert(position, value)
+
+
+def _remove(index, key, value):
+    ids = index.get(key)
+    if ids is not None and _contains(ids, value):
+        ids.pop(bisect_left(ids, value))
+
+
+class FollowGraph:
+    def __init__(self, edges):
+        self.following = {}
+        self.followers = {}
+        for user_id, author_id in edges:
+            self.following.setdefault(user_id, array('l')).append(author_id)
+            self.followers.setdefault(author_id, array('l')).append(user_id)
+        # Рёбра приходят по порядку user_id: досортировать нужно только
+        # списки подписчиков.
+        for author_id, ids in self.followers.items():
+            self.followers[author_id] = array('l', sorted(ids))
+
+    @classmethod
+    def load(cls):
+        edges = Follow.objects.order_by('user_id', 'author_id').values_list(
+            'user_id', 'author_id')
+        return cls(edges.iterator())
+
+    def apply(self, change):
+        operation, user_id, author_id = change
+        if operation == 'follow':
+            _insert(self.following, user_id, author_id)
+            _insert(self.followers, author_id, user_id)
+        else:
+            _remove(self.following, user_id, author_id)
+            _remove(self.followers, author_id, user_id)
+
+
+def _replay(cache, generation):
+    """Применить правки после ``_generation``; ``False``, если их нет."""
+    missed = range(_generation + 1, generation + 1)
+    if len(missed) > settings.FOLLOW_GRAPH_MAX_REPLAY:
+        return False
+    keys = [_change_key(number) for number in missed]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return False
+    for key in keys:
+        _graph.apply(changes[key])
+    return True
+
+
+def enabled():
+    if settings.FOLLOW_GRAPH_ENABLED is None:
+        return is_shared()
+    return settings.FOLLOW_GRAPH_ENABLED
+
+
+def graph():
+    """Актуальный граф текущего процесса.
+
+    Если граф выключен, он каждый раз загружается из базы заново.
+    """
+    global _graph, _generation
+    if not enabled():
+        return FollowGraph.load()
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Случайное начало: старый номер после вытеснения не совпадёт
+        # с новым, и процессы не примут устаревший граф за свежий.
+        cache.add(GENERATION_KEY, random.getrandbits(48), None)
+        generation = cache.get(GENERATION_KEY)
+        with _lock:
+            _graph = None
+    with _lock:
+        if _graph is not None and generation == _generation:
+            return _graph
+        if (_graph is None or generation is None
+                or generation < _generation
+                or not _replay(cache, generation)):
+            _graph = FollowGraph.load()
+        _generation = generation
+        return _graph
+
+
+def _publish(change):
+    cache = get_cache()
+    try:
+        generation = cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Номера нет: все процессы и так перезагрузят граф.
+        return
+    cache.set(_change_key(generation), change,
+              settings.FOLLOW_GRAPH_LOG_TIMEOUT)
+
+
+def _on_commit(func, *args):
+    if enabled():
+        transaction.on_commit(lambda: func(*args))
+
+
+def record_follow(user_id, author_id):
+    _on_commit(_publish, ('follow', user_id, author_id))
+
+
+def record_unfollow(user_id, author_id):
+    _on_commit(_publish, ('unfollow', user_id, author_id))
+
+
+def _drop_generation():
+    get_cache().delete(GENERATION_KEY)
+
+
+def invalidate():
+    """Заставить все процессы загрузить граф заново (после массовых правок)."""
+    _on_commit(_drop_generation)
+
+
+def _ids(field, **lookup):
+    return array('l', Follow.objects.filter(**lookup).order_by(
+        field).values_list(field, flat=True))
+
+
+def is_following(user_id, author_id):
+    if not enabled():
+        return Follow.objects.filter(
+            user_id=user_id, author_id=author_id).exists()
+    return _contains(graph().following.get(user_id, ()), author_id)
+
+
+def following(user_id):
+    """Отсортированные id авторов пользователя (массив не изменять)."""
+    if not enabled():
+        return _ids('author_id', user_id=user_id)
+    return graph().following.get(user_id, array('l'))
+
+
+def followers(author_id):
+    """Отсортированные id подписчиков автора (массив не изменять)."""
+    if not enabled():
+        return _ids('user_id', author_id=author_id)
+    return graph().followers.get(author_id, array('l'))
+
+
+def following_count(user_id):
+    if not enabled():
+        return Follow.objects.filter(user_id=user_id).count()
+    return len(following(user_id))
+
+
+def followers_count(author_id):
+    if not enabled():
+        return Follow.objects.filter(author_id=author_id).count()
+    return len(followers(author_id))
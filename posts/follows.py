@@ -0,0 +1,85 @@
+"""Массовые подписки и отписки.
+
+``bulk_create`` не вызывает сигналы ``Follow``, поэтому всё, что они
+делают для одиночной подписки, ``follow_many`` выполняет явно и сразу
+для всей пачки: сбрасывает граф подписок, отмечает устаревшие
+рекомендации, синхронизирует ленты подписчиков, пересчитывает счётчики
+профилей и сдвигает их водяные знаки. Пары передаются id
+пользователей ``(user_id, author_id)``; подписка на себя пропускается.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import follow_graph, recommendations, stats, timeline, watermarks
+from .models import Follow, User
+
+
+def _existing(pairs):
+    users = {user_id for user_id, _ in pairs}
+    authors = {author_id for _, author_id in pairs}
+    found = Follow.objects.filter(
+        user_id__in=users, author_id__in=authors
+    ).values_list('user_id', 'author_id')
+    return set(found) & pairs
+
+
+def _followed(pairs):
+    """Побочные эффекты сигнала ``follow_saved`` для новых подписок."""
+    follow_graph.invalidate()
+    recommendations.follow_changed.delay(
+        sorted({user_id for user_id, _ in pairs}))
+    for user_id, author_id in pairs:
+        timeline.sync_follow.delay(user_id, author_id)
+    users = User.objects.filter(
+        pk__in={user_id for pair in pairs for user_id in pair})
+    stats.reconcile(users)
+    watermarks.touch(*(f'author:{username}' for username in
+                       users.values_list('username', flat=True)))
+
+
+def follow_many(pairs):
+    """Создать подписки из пар ``(user_id, author_id)``; вернуть число новых.
+
+    Пачка пишется одним ``bulk_create(ignore_conflicts=True)``: уже
+    существующие и одновременно созданные подписки не мешают вставке.
+    """
+    pairs = {(user_id, author_id) for user_id, author_id in pairs
+             if user_id != author_id}
+    if not pairs:
+        return 0
+    with transaction.atomic():
+        new = pairs - _existing(pairs)
+        Follow.objects.bulk_create(
+            [Follow(user_id=user_id, author_id=author_id)
+             for user_id, author_id in new],
+            ignore_conflicts=True)
+        if new:
+            _followed(new)
+    return len(new)
+
+
+def unfollow_many(pairs):
+    """Удалить подписки из пар ``(user_id, author_id)``; вернуть их число.
+
+    Удаление идёт через ``QuerySet.delete``, и сигналы ``Follow``
+    срабатывают для каждой подписки как при одиночной отписке. Пары
+    группируются по подписчику, а авторы удаляются пачками по
+    ``FOLLOW_DELETE_CHUNK_SIZE``: цепочка ``OR`` на каждую пару упирается
+    в предел глубины выражения SQLite.
+    """
+    authors = defaultdict(set)
+    for user_id, author_id in pairs:
+        authors[user_id].add(author_id)
+    size = settings.FOLLOW_DELETE_CHUNK_SIZE
+    deleted = 0
+    with transaction.atomic():
+        for user_id, ids in authors.items():
+            ids = sorted(ids)
+            for start in range(0, len(ids), size):
+                count, _ = Follow.objects.filter(
+                    user_id=user_id, author_id__in=ids[start:start + size]
+                ).delete()
+                deleted += count
+    return deleted
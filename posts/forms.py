@@ -2,6 +2,7 @@ from django import forms
 from django.forms import Textarea
 
 from .models import Post, Comment
+from . import uploads
 
 
 class PostForm(forms.ModelForm):
@@ -17,6 +18,13 @@ class PostForm(forms.ModelForm):
             'text': 'Текст вводить здесь',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        # Новая загрузка; сохранённый файл поста уже проверен.
+        if image and hasattr(image, 'image'):
+            uploads.validate(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,187 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты хранятся в инвертированном индексе в виде стеммированных термов
+(см. ``posts.stemmer``), поэтому разные формы слова находят друг друга.
+Индекс обновляется фоновой задачей ``update``, которую ставят сигналы
+при сохранении и удалении ``Post`` и ``Comment``. Хранилище выбирается
+настройкой ``SEARCH_BACKEND``: по умолчанию это таблица SQLite FTS5,
+для другой СУБД достаточно реализовать ``SearchBackend``. Миграция
+создаёт пустой индекс; уже существующие записи в него добавляет
+команда ``rebuild_search_index``.
+
+Результаты упорядочены по релевантности (bm25) и листаются курсором
+``(rank, rowid)`` без ``OFFSET``.
+"""
+import base64
+import binascii
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+from .stemmer import tokenize
+from .taskqueue import task
+
+KINDS = ('post', 'comment')
+
+Hit = namedtuple('Hit', 'kind obj_id rank rowid')
+
+
+class SearchBackend:
+    """Хранилище инвертированного индекса."""
+
+    def index(self, kind, obj_id, terms):
+        raise NotImplementedError
+
+    def remove(self, kind, obj_id):
+        raise NotImplementedError
+
+    def search(self, terms, kinds=KINDS, after=None, limit=20):
+        """Вернуть список ``Hit``, лучшие совпадения первыми."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class SqliteFtsBackend(SearchBackend):
+    """Индекс в виртуальной таблице FTS5 (создаётся миграцией)."""
+
+    table = 'posts_search'
+
+    @staticmethod
+    def rowid(kind, obj_id):
+        return obj_id * len(KINDS) + KINDS.index(kind)
+
+    def index(self, kind, obj_id, terms):
+        rowid = self.rowid(kind, obj_id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [rowid])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, body) VALUES (%s, %s)',
+                [rowid, ' '.join(terms)])
+
+    def remove(self, kind, obj_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s',
+                           [self.rowid(kind, obj_id)])
+
+    def search(self, terms, kinds=KINDS, after=None, limit=20):
+        if not terms:
+            return []
+        match = ' '.join('"{}"'.format(term.replace('"', ''))
+                         for term in terms)
+        sql = [f'SELECT rowid, rank FROM {self.table} '
+               f'WHERE {self.table} MATCH %s']
+        params = [match]
+        if set(kinds) != set(KINDS):
+            sql.append('AND rowid %% %s IN ({})'.format(
+                ', '.join(['%s'] * len(kinds))))
+            params += [len(KINDS)] + [KINDS.index(kind) for kind in kinds]
+        if after is not None:
+            sql.append('AND (rank > %s OR (rank = %s AND rowid > %s))')
+            params += [after[0], after[0], after[1]]
+        sql.append('ORDER BY rank, rowid LIMIT %s')
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            rows = cursor.fetchall()
+        return [Hit(KINDS[rowid % len(KINDS)], rowid // len(KINDS),
+                    rank, rowid)
+                for rowid, rank in rows]
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+
+backend = SimpleLazyObject(lambda: import_string(settings.SEARCH_BACKEND)())
+
+
+def encode_cursor(hit):
+    raw = f'{hit.rank!r}|{hit.rowid}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        rank, rowid = raw.decode().split('|')
+        return float(rank), int(rowid)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def index_post(post):
+    backend.index('post', post.pk, tokenize(post.text))
+
+
+def index_comment(comment):
+    backend.index('comment', comment.pk, tokenize(comment.text))
+
+
+def remove(kind, obj_id):
+    backend.remove(kind, obj_id)
+
+
+@task
+def update(kind, obj_id):
+    """Переиндексировать объект по текущему состоянию в базе."""
+    model = Post if kind == 'post' else Comment
+    obj = model.objects.filter(pk=obj_id).only('text').first()
+    if obj is None:
+        remove(kind, obj_id)
+    else:
+        backend.index(kind, obj_id, tokenize(obj.text))
+
+
+def rebuild():
+    """Переиндексировать все посты и комментарии."""
+    backend.clear()
+    total = 0
+    for post in Post.objects.only('text').iterator():
+        index_post(post)
+        total += 1
+    for comment in Comment.objects.only('text').iterator():
+        index_comment(comment)
+        total += 1
+    return total
+
+
+def matching_ids(kind, query, limit=None):
+    """Первичные ключи объектов ``kind``, подходящих под запрос."""
+    hits = backend.search(tokenize(query), kinds=(kind,),
+                          limit=limit or settings.SEARCH_ADMIN_LIMIT)
+    return [hit.obj_id for hit in hits]
+
+
+def find(query, cursor=None, per_page=None):
+    """Найти посты и комментарии: вернуть ``(объекты, курсор дальше)``.
+
+    У каждого объекта есть атрибут ``search_kind`` — ``post`` или
+    ``comment``.
+    """
+    per_page = per_page or settings.POSTS_PER_PAGE
+    hits = backend.search(tokenize(query), after=decode_cursor(cursor),
+                          limit=per_page + 1)
+    next_cursor = (encode_cursor(hits[per_page - 1])
+                   if len(hits) > per_page else None)
+    hits = hits[:per_page]
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [hit.obj_id for hit in hits if hit.kind == 'post'])
+    comments = Comment.objects.select_related(
+        'author', 'post__author').in_bulk(
+        [hit.obj_id for hit in hits if hit.kind == 'comment'])
+    results = []
+    for hit in hits:
+        obj = (posts if hit.kind == 'post' else comments).get(hit.obj_id)
+        if obj is not None:
+            obj.search_kind = hit.kind
+            results.append(obj)
+    return results, next_cursor
@@ -0,0 +1,142 @@
+"""Горячие страницы групп.
+
+Для каждой группы в кэше лежат пары ``(pub_date, pk)`` первых
+``GROUP_HOT_SIZE`` постов, новые первыми, а сама группа кэшируется по
+slug. Список правится сигналами при создании, удалении и переносе поста
+в другую группу, поэтому первые страницы группы собираются через
+``in_bulk`` по готовым id без сортирующего запроса (см. ``paginate``).
+
+Правки идут под блокировкой ``cache.add``. Если её взять не удалось,
+список помечается грязным и пересобирается при следующем чтении. Если
+при чтении какого-то поста из списка уже нет в группе, список
+сбрасывается, а страница строится обычным запросом.
+
+Лента группы читается с реплики, а список собирается с основной базы:
+пост, которого отстающая реплика ещё не видит, не выпадет из списка, а
+``paginate`` доберёт его оттуда же. На случай пропущенной правки
+список всё равно живёт не дольше ``GROUP_HOT_TIMEOUT`` секунд.
+
+Правки видны другим процессам только через общий кэш, поэтому с кэшем
+в памяти процесса списки выключены (``GROUP_HOT_ENABLED``): группа и
+её лента читаются обычными запросами.
+"""
+from django.conf import settings
+
+from .cache import get_cache, get_or_set, is_shared
+from .models import Group, Post
+
+
+def _key(group_id):
+    return f'group_hot:{group_id}'
+
+
+def _slug_key(slug):
+    return f'group_slug:{slug}'
+
+
+class HotList:
+    """Начало ленты группы для ``paginate(..., hot=...)``."""
+
+    def __init__(self, group_id, keys):
+        self.group_id = group_id
+        self.keys = keys
+        # Короткий список содержит все посты группы.
+        self.complete = len(keys) < settings.GROUP_HOT_SIZE
+
+    def invalidate(self):
+        invalidate(self.group_id)
+
+
+def enabled():
+    if settings.GROUP_HOT_ENABLED is None:
+        return is_shared()
+    return settings.GROUP_HOT_ENABLED
+
+
+def group_by_slug(slug):
+    """Группа по slug из кэша или ``None``, если её нет."""
+    def load():
+        return Group.objects.filter(slug=slug).first()
+
+    if not enabled():
+        return load()
+    return get_or_set(_slug_key(slug), load, settings.GROUP_CACHE_TIMEOUT)
+
+
+def forget_group(group):
+    if enabled():
+        get_cache().delete_many([_slug_key(group.slug), _key(group.pk)])
+
+
+def _load(group_id):
+    return list(Post.objects.using('default').filter(
+        group_id=group_id).order_by(
+        '-pub_date', '-pk').values_list('pub_date', 'pk')[
+        :settings.GROUP_HOT_SIZE])
+
+
+def for_group(group_id):
+    """Список группы для ``paginate`` или ``None``, если он выключен."""
+    if not enabled():
+        return None
+    cache = get_cache()
+    key = _key(group_id)
+    keys = cache.get(key)
+    if keys is None or cache.get(f'{key}:dirty'):
+        keys = _load(group_id)
+        cache.set(key, keys, settings.GROUP_HOT_TIMEOUT)
+        cache.delete(f'{key}:dirty')
+    return HotList(group_id, keys)
+
+
+def invalidate(group_id):
+    get_cache().delete(_key(group_id))
+
+
+def _update(group_id, change):
+    """Применить ``change(keys)`` к закэшированному списку группы."""
+    if not enabled():
+        return
+    cache = get_cache()
+    key = _key(group_id)
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, settings.POSTS_CACHE_LOCK_TIMEOUT):
+        cache.set(f'{key}:dirty', 1, settings.GROUP_HOT_TIMEOUT)
+        return
+    try:
+        keys = cache.get(key)
+        if keys is not None:
+            keys = change(keys)
+            if keys is None:
+                cache.delete(key)
+            else:
+                cache.set(key, keys, settings.GROUP_HOT_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def add(post):
+    """Поставить пост группы на его место в списке."""
+    entry = (post.pub_date, post.pk)
+
+    def change(keys):
+        keys = [key for key in keys if key[1] != post.pk]
+        full = len(keys) >= settings.GROUP_HOT_SIZE
+        if full and entry < keys[-1]:
+            return keys
+        return sorted(keys + [entry], reverse=True)[:settings.GROUP_HOT_SIZE]
+
+    _update(post.group_id, change)
+
+
+def remove(group_id, post_id):
+    """Убрать пост из списка группы."""
+    def change(keys):
+        rest = [key for key in keys if key[1] != post_id]
+        if len(rest) == len(keys):
+            return keys
+        # Из полного списка нельзя просто убрать пост: на его место
+        # должен встать следующий, которого в кэше нет.
+        return None if len(keys) >= settings.GROUP_HOT_SIZE else rest
+
+    _update(group_id, change)
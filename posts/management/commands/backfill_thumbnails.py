@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Ставит в очередь миниатюры постов с картинкой, у которых '
+            'их ещё нет (старые посты и посты с упавшей задачей)')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').filter(thumbnail='')
+        total = 0
+        for post_id in posts.values_list('pk', flat=True).iterator():
+            thumbnails.generate.delay(post_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Поставлено в очередь миниатюр: {total}'))
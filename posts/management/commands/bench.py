@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Меряет задержку, число SQL-запросов и память view posts '
+            'и сохраняет результат в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'views', nargs='*',
+            help='Какие сценарии прогнать (по умолчанию все)',
+        )
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом',
+        )
+        parser.add_argument(
+            '--output', default='bench_output.json',
+            help='Файл для результатов',
+        )
+
+    def handle(self, *args, **options):
+        results = benchmark.run(
+            requests=options['requests'],
+            warmup=options['warmup'],
+            views=options['views'],
+            cold=options['cold'],
+        )
+        report = {
+            'revision': benchmark.revision(),
+            'created': timezone.now().isoformat(),
+            'cold': options['cold'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        for name, result in results.items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{name:<14} p50 {latency["p50"]:8.2f} мс  '
+                f'p99 {latency["p99"]:8.2f} мс  '
+                f'запросов {result["queries"]["max"]:3}  '
+                f'память {result["memory_peak_kib"]["max"]:8.0f} КиБ')
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'))
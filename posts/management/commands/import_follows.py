@@ -0,0 +1,60 @@
+import csv
+import sys
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import follows
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = ('Импортирует подписки из CSV с парами «подписчик,автор» '
+            '(имена или id пользователей)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='CSV-файл с парами; «-» — стандартный ввод',
+        )
+        parser.add_argument(
+            '--ids', action='store_true',
+            help='В файле id пользователей, а не имена',
+        )
+        parser.add_argument(
+            '--chunk', type=int, default=settings.FOLLOW_IMPORT_CHUNK_SIZE,
+            help='Сколько пар записывать за раз',
+        )
+
+    def _resolve(self, rows, ids):
+        """Пары id для строк пачки; строки с неизвестными именами — мимо."""
+        if ids:
+            return [(int(user), int(author)) for user, author in rows]
+        names = {name for row in rows for name in row}
+        known = dict(User.objects.filter(
+            username__in=names).values_list('username', 'pk'))
+        return [(known[user], known[author]) for user, author in rows
+                if user in known and author in known]
+
+    def handle(self, *args, **options):
+        source = (sys.stdin if options['path'] == '-'
+                  else open(options['path'], newline=''))
+        rows = (row[:2] for row in csv.reader(source) if len(row) >= 2)
+        total = created = 0
+        started = time.monotonic()
+        with source:
+            while True:
+                chunk = list(islice(rows, options['chunk']))
+                if not chunk:
+                    break
+                total += len(chunk)
+                created += follows.follow_many(
+                    self._resolve(chunk, options['ids']))
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Обработано пар: {total}')
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Пар: {total}, новых подписок: {created}, '
+            f'пропущено: {total - created} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-6):.0f} пар в секунду)'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import fulltext
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс постов и комментариев'
+
+    def handle(self, *args, **options):
+        total = fulltext.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано записей: {total}'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «на кого подписаться»'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать всех, а не только устаревших',
+        )
+        parser.add_argument(
+            '--top', type=int,
+            help='Сколько рекомендаций хранить на пользователя',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = recommendations.refresh(everyone=options['all'],
+                                        top_k=options['top'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано пользователей: {total} '
+            f'за {time.monotonic() - started:.1f} с'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики профилей с таблицами Post и Follow'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пользователи, чьи счётчики сверить (по умолчанию все)',
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        fixed = stats.reconcile(users)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {fixed}'))
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import taskqueue
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди (воркер)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и выйти',
+        )
+        parser.add_argument(
+            '--batch', type=int, default=100,
+            help='Сколько задач забирать за раз',
+        )
+
+    def handle(self, *args, **options):
+        total_done = total_failed = 0
+        while True:
+            taskqueue.purge()
+            done, failed = taskqueue.run_pending(options['batch'])
+            total_done += done
+            total_failed += failed
+            if done or failed:
+                continue
+            if options['once']:
+                break
+            time.sleep(settings.TASKS_POLL_INTERVAL)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {total_done}, с ошибкой: {total_failed}'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Наполняет базу данными для нагрузочного теста view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--images', type=int, default=200,
+            help='Сколько постов получат картинку',
+        )
+        parser.add_argument(
+            '--follows-per-user', type=int, default=20,
+            help='Среднее число подписок на пользователя',
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.2,
+            help='Показатель степенного закона для подписок и авторства',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        counts = benchmark.seed(
+            users=options['users'],
+            posts=options['posts'],
+            groups=options['groups'],
+            comments=options['comments'],
+            images=options['images'],
+            follows_per_user=options['follows_per_user'],
+            alpha=options['alpha'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{name}: {total}' for name, total in counts.items())))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import uploads
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки постов, на которые не ссылается ни один '
+            'пост (запускать по расписанию)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=None,
+            help='Не трогать файлы моложе стольких секунд '
+                 '(по умолчанию MEDIA_SWEEP_GRACE)',
+        )
+
+    def handle(self, *args, **options):
+        deleted = uploads.sweep(grace=options['grace'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов: {deleted}'))
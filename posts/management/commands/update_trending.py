@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Обновляет оценки «Популярного» (запускать по расписанию)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересобрать оценки по событиям за TRENDING_WINDOW',
+        )
+
+    def handle(self, *args, **options):
+        posts, groups = trending.update(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Новые события у постов: {posts}, у групп: {groups}'))
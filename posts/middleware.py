@@ -0,0 +1,71 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import profiling
+
+
+class ProfilingMiddleware:
+    """Записывает число SQL-запросов, время SQL и шаблонов по view.
+
+    Замеряется случайная доля запросов ``PERF_SAMPLE_RATE``, поэтому
+    middleware можно держать включённым и в продакшене. Заголовок
+    ``Server-Timing`` замеренные ответы получают только для сотрудников
+    или при ``PERF_SERVER_TIMING``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PERF_SAMPLE_RATE:
+            return self.get_response(request)
+
+        sql = {'queries': 0, 'time': 0.0}
+
+        def count_query(execute, query, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(query, params, many, context)
+            finally:
+                sql['queries'] += 1
+                sql['time'] += time.perf_counter() - started
+
+        profiling.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(count_query))
+                response = self.get_response(request)
+        finally:
+            template_time, cache_events = profiling.stop()
+        total = time.perf_counter() - started
+
+        match = request.resolver_match
+        profiling.record(profiling.Sample(
+            view=match.view_name if match else request.path_info,
+            created=time.time(),
+            method=request.method,
+            status=response.status_code,
+            total_ms=total * 1000,
+            queries=sql['queries'],
+            sql_ms=sql['time'] * 1000,
+            template_ms=template_time * 1000,
+            cache_hits=cache_events['hit'] + cache_events['stale'],
+            cache_misses=cache_events['miss'],
+        ))
+        user = getattr(request, 'user', None)
+        if not (settings.PERF_SERVER_TIMING
+                or (user is not None and user.is_staff)):
+            return response
+        response['Server-Timing'] = ', '.join((
+            f'sql;dur={sql["time"] * 1000:.1f}',
+            f'tpl;dur={template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        return response
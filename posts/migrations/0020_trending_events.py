@@ -0,0 +1,26 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=7)),
+                ('object_id', models.PositiveIntegerField()),
+                ('created', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='trendingevent',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='trending_event_unique'),
+        ),
+    ]
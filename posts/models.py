@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.shortcuts import reverse
+from django.utils import timezone
 
 
 User = get_user_model()
@@ -45,9 +46,47 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+    thumbnail = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+
+    # Заполняются сигналами и фоновыми задачами, поэтому обычное
+    # сохранение поста не должно перезаписывать их устаревшими значениями.
+    derived_fields = ('comment_count', 'version', 'thumbnail')
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='post_author_date_idx'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='post_group_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.derived_fields
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def card_version(self):
+        """Часть ключа кэша карточки, меняется при любом её изменении."""
+        return f'{self.pk}.{self.version}.{self.pub_date.timestamp()}'
 
     def get_absolute_url(self):
         return reverse('post', args=[self.author, self.pk])
@@ -81,6 +120,11 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+            models.Index(fields=['created'], name='comment_created_idx'),
+        ]
 
     def __str__(self):
         return(f' user: {self.author},'
@@ -96,8 +140,196 @@ class Follow(models.Model):
         User, on_delete=models.CASCADE,
         related_name='following',
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='following_unique',
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя.
+
+    Заполняется при записи (fan-out-on-write): при публикации поста
+    и при подписке/отписке, поэтому чтение ленты сводится к
+    диапазонному проходу по индексу (user, pub_date).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='timeline_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'],
+                name='timeline_feed_idx',
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики профиля, которые поддерживаются сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return (f' user: {self.user_id},'
+                f' posts: {self.posts_count},'
+                f' followers: {self.followers_count},'
+                f' following: {self.following_count}')
+
+
+class Task(models.Model):
+    """Фоновая задача в очереди (см. ``posts.taskqueue``)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'выполнена'),
+        (FAILED, 'не удалась'),
+    )
+
+    name = models.CharField(max_length=200)
+    args = models.TextField(default='[]')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('run_after', 'id')
+        indexes = [
+            models.Index(fields=['status', 'run_after'],
+                         name='task_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name}{self.args} [{self.status}]'
+
+
+class Recommendation(models.Model):
+    """Подсказка «на кого подписаться» (см. ``posts.recommendations``)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='recommendation_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score'],
+                         name='recommendation_user_idx'),
+        ]
+
+
+class StaleRecommendations(models.Model):
+    """Пользователь, чьи рекомендации устарели после правок подписок."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+
+
+class TrendingPost(models.Model):
+    """Оценка поста в «Популярном» (см. ``posts.trending``)."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+    )
+    score = models.FloatField()
+    computed = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-score',)
+        indexes = [
+            models.Index(fields=['-score'], name='trending_post_score_idx'),
+        ]
+
+
+class TrendingGroup(models.Model):
+    """Оценка группы в «Популярном» (см. ``posts.trending``)."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+    )
+    score = models.FloatField()
+    computed = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-score',)
+        indexes = [
+            models.Index(fields=['-score'], name='trending_group_score_idx'),
+        ]
+
+
+class TrendingEvent(models.Model):
+    """Событие, уже учтённое в «Популярном» (см. ``posts.trending``).
+
+    Хранятся только события последних ``TRENDING_MARGIN`` секунд: с ними
+    перекрывается окно следующего запуска.
+    """
+    kind = models.CharField(max_length=7)
+    object_id = models.PositiveIntegerField()
+    created = models.DateTimeField()
+
     class Meta:
-        models.UniqueConstraint(
-            fields=['user','author'],
-            name=['following_unique']
-        )
\ No newline at end of file
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'],
+                name='trending_event_unique',
+            ),
+        ]
@@ -0,0 +1,188 @@
+"""Курсорная (keyset) пагинация лент.
+
+Страница выбирается не через ``OFFSET``, а условием по паре
+``(pub_date, pk)`` последнего показанного объекта, поэтому любая
+страница стоит столько же, сколько первая. ``COUNT(*)`` не выполняется
+вовсе, если не включён режим примерного подсчёта для номеров страниц.
+
+Номерные ссылки ``?page=N`` идут через ``OFFSET``, поэтому их глубина
+ограничена ``PAGINATOR_MAX_PAGE``: дальше лента листается только
+курсором, а более глубокий номер отвечает 404.
+"""
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+from .cache import get_or_set
+
+PAGE_LINKS_AROUND = 2
+
+
+def encode_cursor(value, pk, number):
+    raw = f'{value.isoformat()}|{pk}|{number}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Вернуть ``(value, pk, number)`` или ``None`` для битого курсора."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, pk, number = raw.decode().split('|')
+        value = parse_datetime(value)
+        pk, number = int(pk), int(number)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if value is None:
+        return None
+    return value, pk, max(number, 1)
+
+
+def estimated_count(queryset, count_key):
+    """Количество объектов, закэшированное на PAGINATOR_COUNT_TIMEOUT."""
+    return get_or_set(f'paginator_count:{count_key}', queryset.count,
+                      settings.PAGINATOR_COUNT_TIMEOUT)
+
+
+def _older(queryset, value, pk, date_field, pk_field):
+    return queryset.filter(
+        Q(**{f'{date_field}__lt': value})
+        | Q(**{date_field: value, f'{pk_field}__lt': pk}))
+
+
+def keyset_slice(queryset, token, per_page,
+                 date_field='pub_date', pk_field='pk'):
+    """Вернуть ``(срез, номер страницы)`` — объекты после курсора ``token``.
+
+    В отличие от ``paginate`` срез остаётся ``QuerySet`` и не требует
+    лишней строки: есть ли следующая страница, вызывающий код решает
+    сам, например по денормализованному счётчику.
+    """
+    cursor = decode_cursor(token)
+    number = 1
+    if cursor is not None:
+        value, pk, number = cursor
+        queryset = _older(queryset, value, pk, date_field, pk_field)
+        number += 1
+    return (queryset.order_by(f'-{date_field}', f'-{pk_field}')[:per_page],
+            number)
+
+
+def _page_links(number, num_pages):
+    first = max(number - PAGE_LINKS_AROUND, 1)
+    last = min(number + PAGE_LINKS_AROUND, num_pages)
+    return [i for i in range(first, last + 1)
+            if i <= settings.PAGINATOR_MAX_PAGE or i == number]
+
+
+def _too_deep(page_number):
+    try:
+        return int(page_number) > settings.PAGINATOR_MAX_PAGE
+    except ValueError:
+        return False
+
+
+def paginate(request, queryset, per_page=None,
+             date_field='pub_date', pk_field='pk', count_key=None, hot=None):
+    """Разбить ``queryset`` на страницы по курсору из ``?after=``/``?before=``.
+
+    Возвращает пару ``(paginator, page)``. У страницы есть атрибуты
+    ``next_cursor`` и ``previous_cursor`` для ссылок и ``page_links`` —
+    номера соседних страниц, если передан ``count_key`` и включён
+    ``PAGINATOR_ESTIMATE_COUNT``. Ссылки вида ``?page=N`` до
+    ``PAGINATOR_MAX_PAGE`` обслуживаются обычным ``Paginator``, более
+    глубокие — ``Http404``.
+
+    ``hot`` — закэшированное начало ленты (см. ``posts.hot_groups``):
+    страницы, которые в нём помещаются, берутся по id без сортировки.
+    """
+    per_page = per_page or settings.POSTS_PER_PAGE
+    paginator = Paginator(queryset, per_page)
+    estimate = count_key is not None and settings.PAGINATOR_ESTIMATE_COUNT
+    if estimate and hot is not None and hot.complete:
+        # В полном списке уже все объекты ленты.
+        paginator.count = len(hot.keys)
+    elif estimate:
+        paginator.count = estimated_count(queryset, count_key)
+
+    newest_first = (f'-{date_field}', f'-{pk_field}')
+    after = decode_cursor(request.GET.get('after'))
+    before = decode_cursor(request.GET.get('before'))
+    page_number = request.GET.get('page')
+
+    hot_rows = None
+    if hot is not None and before is None and (
+            after is not None or page_number in (None, '', '1')):
+        hot_rows = _hot_rows(queryset, hot, after, per_page)
+
+    if after is not None:
+        value, pk, number = after
+        rows = hot_rows
+        if rows is None:
+            rows = list(_older(queryset, value, pk, date_field, pk_field)
+                        .order_by(*newest_first)[:per_page + 1])
+        has_next, has_previous = len(rows) > per_page, True
+        rows, number = rows[:per_page], number + 1
+    elif before is not None:
+        value, pk, number = before
+        rows = list(queryset.filter(
+            Q(**{f'{date_field}__gt': value})
+            | Q(**{date_field: value, f'{pk_field}__gt': pk})
+        ).order_by(date_field, pk_field)[:per_page + 1])
+        has_next, has_previous = True, len(rows) > per_page
+        rows, number = rows[:per_page][::-1], max(number - 1, 1)
+    elif page_number not in (None, '', '1'):
+        if _too_deep(page_number):
+            raise Http404
+        page = paginator.get_page(page_number)
+        rows, number = list(page.object_list), page.number
+        has_next, has_previous = page.has_next(), page.has_previous()
+    else:
+        rows = hot_rows
+        if rows is None:
+            rows = list(queryset.order_by(*newest_first)[:per_page + 1])
+        has_next, has_previous = len(rows) > per_page, False
+        rows, number = rows[:per_page], 1
+
+    page = Page(rows, number, paginator)
+    page.next_cursor = page.previous_cursor = None
+    if rows and has_next:
+        page.next_cursor = _cursor(rows[-1], date_field, pk_field, number)
+    if rows and has_previous:
+        page.previous_cursor = _cursor(rows[0], date_field, pk_field, number)
+    page.page_links = (
+        _page_links(number, paginator.num_pages) if estimate else [])
+    return paginator, page
+
+
+def _hot_rows(queryset, hot, after, per_page):
+    """Строки страницы из ``hot`` или ``None``, если она туда не влезла."""
+    start = 0
+    if after is not None:
+        value, pk, _ = after
+        start = next((i for i, key in enumerate(hot.keys)
+                      if key < (value, pk)), len(hot.keys))
+    window = hot.keys[start:start + per_page + 1]
+    if len(window) <= per_page and not hot.complete:
+        return None
+    ids = [pk for _, pk in window]
+    found = queryset.in_bulk(ids)
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        # Реплика могла ещё не получить новые посты из списка.
+        found.update(queryset.using('default').in_bulk(missing))
+    if len(found) != len(ids):
+        hot.invalidate()
+        return None
+    return [found[pk] for pk in ids]
+
+
+def _cursor(obj, date_field, pk_field, number):
+    return encode_cursor(
+        getattr(obj, date_field), getattr(obj, pk_field), number)
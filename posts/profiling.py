@@ -0,0 +1,119 @@
+"""Замеры запросов: SQL, рендеринг шаблонов и кэш.
+
+``ProfilingMiddleware`` (``posts.middleware``) для доли запросов
+``PERF_SAMPLE_RATE`` собирает ``Sample`` и кладёт его в кольцевой буфер
+процесса на ``PERF_BUFFER_SIZE`` записей. Сводку по view показывает
+страница ``/admin/perf/``.
+
+Время шаблонов считает бэкенд ``DjangoTemplates`` из этого модуля (он
+указан в ``settings.TEMPLATES``), попадания в кэш — ``count``, который
+вызывают ``posts.cache`` и тег ``card_cache``. Замер и счётчики живут в
+потоке запроса, поэтому одновременные запросы не смешиваются.
+"""
+import threading
+import time
+from collections import Counter, defaultdict, deque, namedtuple
+
+from django.conf import settings
+from django.template.backends import django as django_backend
+
+Sample = namedtuple('Sample', (
+    'view created method status total_ms queries sql_ms template_ms '
+    'cache_hits cache_misses'
+))
+
+_samples = deque(maxlen=settings.PERF_BUFFER_SIZE)
+_local = threading.local()
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        """Отрисовать шаблон с учётом времени в текущем замере."""
+        timer = getattr(_local, 'timer', None)
+        if timer is None or timer['rendering']:
+            return super().render(context, request)
+        timer['rendering'] = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timer['template'] += time.perf_counter() - started
+            timer['rendering'] = False
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Обычный бэкенд Django, шаблоны которого попадают в замер."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return Template(
+            super().get_template(template_name).template, self)
+
+
+def start():
+    """Начать замер в текущем потоке."""
+    _local.timer = {'template': 0.0, 'rendering': False,
+                    'cache': Counter()}
+
+
+def stop():
+    """Закончить замер: вернуть время шаблонов (с) и счётчики кэша."""
+    timer = _local.__dict__.pop('timer', None)
+    if timer is None:
+        return 0.0, Counter()
+    return timer['template'], timer['cache']
+
+
+def count(event):
+    """Учесть событие кэша (``hit``, ``stale``, ``miss``) в замере."""
+    timer = getattr(_local, 'timer', None)
+    if timer is not None:
+        timer['cache'][event] += 1
+
+
+def record(sample):
+    _samples.append(sample)
+
+
+def samples():
+    return list(_samples)
+
+
+def clear():
+    _samples.clear()
+
+
+def percentile(values, percent):
+    """Значение перцентиля ``percent`` методом ближайшего ранга."""
+    values = sorted(values)
+    if not values:
+        return None
+    index = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def summary():
+    """Сводка по view: самые медленные по p99 первыми."""
+    by_view = defaultdict(list)
+    for sample in samples():
+        by_view[sample.view].append(sample)
+    rows = []
+    for view, items in by_view.items():
+        total = [item.total_ms for item in items]
+        lookups = sum(item.cache_hits + item.cache_misses for item in items)
+        rows.append({
+            'view': view,
+            'requests': len(items),
+            'p50_ms': percentile(total, 50),
+            'p99_ms': percentile(total, 99),
+            'queries_avg': sum(item.queries for item in items) / len(items),
+            'queries_max': max(item.queries for item in items),
+            'sql_ms_avg': sum(item.sql_ms for item in items) / len(items),
+            'template_ms_avg': (sum(item.template_ms for item in items)
+                                / len(items)),
+            'cache_hit_ratio': (sum(item.cache_hits for item in items)
+                                / lookups if lookups else None),
+        })
+    return sorted(rows, key=lambda row: -row['p99_ms'])
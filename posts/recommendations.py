@@ -0,0 +1,172 @@
+"""Рекомендации «на кого подписаться».
+
+Считаются пакетно (команда ``recommend``) по разреженной матрице
+подписок ``A`` (строка — подписчик, столбец — автор), построенной из
+графа подписок в памяти (``posts.follow_graph``). Строки и столбцы —
+плотные номера пользователей, у которых есть подписки или подписчики,
+а не их id. Для блока пользователей ``B`` оценка автора складывается
+из двух частей:
+
+* друзья друзей — ``A[B] @ A``: сколько авторов пользователя сами
+  подписаны на кандидата;
+* совместные подписки — ``S @ A``, где ``S`` — косинусная близость
+  ``A[B]`` к ``A`` (строки ``A`` нормированы), в строке которой
+  оставлены ``RECOMMENDATIONS_SIMILAR_USERS`` самых похожих
+  пользователей: на кого подписаны они.
+
+Авторы, на которых пользователь уже подписан, и он сам отбрасываются,
+в таблицу ``Recommendation`` пишутся ``RECOMMENDATIONS_TOP_K`` лучших.
+Правки подписок отмечают пользователя и его подписчиков в
+``StaleRecommendations`` (фоновой задачей ``follow_changed``): ночной
+запуск пересчитывает только их, а ``--all`` — всех.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from . import follow_graph
+from .models import Follow, Recommendation, StaleRecommendations
+from .taskqueue import task
+
+
+def mark_stale(user_ids):
+    StaleRecommendations.objects.bulk_create(
+        [StaleRecommendations(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True)
+
+
+@task
+def follow_changed(user_ids):
+    """Отметить тех, чьи рекомендации зависят от подписок ``user_ids``."""
+    followers = Follow.objects.filter(author_id__in=user_ids).values_list(
+        'user_id', flat=True)
+    mark_stale({*user_ids, *followers})
+
+
+def for_user(user):
+    return Recommendation.objects.filter(user=user).select_related(
+        'author')[:settings.RECOMMENDATIONS_TOP_K]
+
+
+def dense_ids(graph, users=()):
+    """Отсортированные id всех, кто есть в графе или в ``users``.
+
+    Номер id в этом массиве — строка и столбец матрицы подписок.
+    """
+    ids = {*graph.following, *graph.followers, *users}
+    return np.array(sorted(ids), dtype=np.int64)
+
+
+def follow_matrix(following, ids):
+    """CSR-матрица подписок ``len(ids) × len(ids)`` из списков графа."""
+    size = len(ids)
+    users = [user_id for user_id, authors in following.items() if authors]
+    if not users:
+        return sparse.csr_matrix((size, size), dtype=np.float32)
+    lengths = [len(following[user_id]) for user_id in users]
+    rows = np.repeat(np.searchsorted(ids, users), lengths)
+    columns = np.searchsorted(ids, np.concatenate([
+        np.frombuffer(following[user_id], dtype=np.dtype('l'))
+        for user_id in users]))
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(size, size))
+
+
+def _normalized(matrix):
+    degree = np.asarray(matrix.sum(axis=1)).ravel()
+    scale = np.zeros_like(degree)
+    np.divide(1, np.sqrt(degree), out=scale, where=degree > 0)
+    return sparse.diags(scale) @ matrix
+
+
+def _best(indices, values, top_k):
+    if len(values) > top_k:
+        best = np.argpartition(-values, top_k)[:top_k]
+        indices, values = indices[best], values[best]
+    return indices, values
+
+
+def _top(scores, followed, user, ids, top_k):
+    """Лучшие ``(author_id, score)`` строки без подписок и себя."""
+    keep = ((scores.data > 0) & (scores.indices != user)
+            & ~np.isin(scores.indices, followed))
+    authors, values = _best(scores.indices[keep], scores.data[keep], top_k)
+    authors = ids[authors]
+    order = np.lexsort((authors, -values))
+    return list(zip(authors[order].tolist(), values[order].tolist()))
+
+
+def _most_similar(similarity, block, top_k):
+    """Оставить в каждой строке ``top_k`` самых похожих, кроме себя."""
+    rows, columns, values = [], [], []
+    for row, user in enumerate(block):
+        scores = similarity[row]
+        keep = scores.indices != user
+        indices, data = _best(scores.indices[keep], scores.data[keep],
+                              top_k)
+        rows.append(np.full(len(indices), row))
+        columns.append(indices)
+        values.append(data)
+    return sparse.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows),
+                                  np.concatenate(columns))),
+        shape=similarity.shape, dtype=np.float32)
+
+
+def score_block(matrix, normalized, block, ids, top_k):
+    """Рекомендации для строк ``block`` — словарь id -> список.
+
+    ``block`` — номера строк матрицы, ``ids`` — их id (``dense_ids``).
+    """
+    rows = matrix[block]
+    similar = _most_similar(
+        (normalized[block] @ normalized.T).tocsr(), block,
+        settings.RECOMMENDATIONS_SIMILAR_USERS)
+    scores = (settings.RECOMMENDATIONS_FOF_WEIGHT * (rows @ matrix)
+              + settings.RECOMMENDATIONS_COFOLLOW_WEIGHT
+              * (similar @ matrix))
+    scores = scores.tocsr()
+    return {
+        int(ids[user]): _top(scores[index], rows[index].indices, user,
+                             ids, top_k)
+        for index, user in enumerate(block)
+    }
+
+
+def _store(results):
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=list(results)).delete()
+        Recommendation.objects.bulk_create(
+            [Recommendation(user_id=user_id, author_id=author_id,
+                            score=score)
+             for user_id, suggestions in results.items()
+             for author_id, score in suggestions],
+            batch_size=settings.RECOMMENDATIONS_BLOCK_SIZE)
+
+
+def refresh(everyone=False, top_k=None):
+    """Пересчитать рекомендации устаревших (или всех) пользователей.
+
+    Вернуть число пользователей, для которых они пересчитаны.
+    """
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+    stale = set(StaleRecommendations.objects.values_list(
+        'user_id', flat=True))
+    graph = follow_graph.graph()
+    users = set(graph.following) | stale if everyone else stale
+    ids = dense_ids(graph, users)
+    users = np.searchsorted(ids, sorted(users))
+    matrix = follow_matrix(graph.following, ids)
+    normalized = _normalized(matrix)
+    block_size = settings.RECOMMENDATIONS_BLOCK_SIZE
+    for start in range(0, len(users), block_size):
+        block = users[start:start + block_size]
+        results = score_block(matrix, normalized, block, ids, top_k)
+        _store(results)
+        # Отметки, появившиеся во время расчёта, остаются до следующего.
+        StaleRecommendations.objects.filter(
+            user_id__in=[user_id for user_id in results if user_id in stale]
+        ).delete()
+    return len(users)
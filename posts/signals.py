@@ -0,0 +1,118 @@
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import (follow_graph, fulltext, hot_groups, recommendations, stats,
+               timeline, watermarks)
+from .models import Comment, Follow, Group, Post
+
+
+def _touch_post(post):
+    watermarks.touch(*watermarks.post_scopes(
+        post.pk, post.author.username,
+        post.group.slug if post.group_id else None))
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    # Пост могли перенести в другую группу: её страница тоже изменилась.
+    if not raw and not instance._state.adding:
+        old = Post.objects.filter(pk=instance.pk).values(
+            'group_id', 'group__slug').first()
+        if old and old['group_id'] not in (None, instance.group_id):
+            watermarks.touch(f'group:{old["group__slug"]}')
+            hot_groups.remove(old['group_id'], instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    fulltext.update.delay('post', instance.pk)
+    _touch_post(instance)
+    if instance.group_id:
+        hot_groups.add(instance)
+    if created:
+        timeline.fan_out.delay(instance.pk)
+        stats.bump(instance.author_id, posts_count=1)
+    else:
+        Post.objects.filter(pk=instance.pk).update(version=F('version') + 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    fulltext.update.delay('post', instance.pk)
+    _touch_post(instance)
+    if instance.group_id:
+        hot_groups.remove(instance.group_id, instance.pk)
+    stats.bump(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        follow_graph.record_follow(instance.user_id, instance.author_id)
+        recommendations.follow_changed.delay([instance.user_id])
+        timeline.sync_follow.delay(instance.user_id, instance.author_id)
+        stats.bump(instance.author_id, followers_count=1)
+        stats.bump(instance.user_id, following_count=1)
+        watermarks.touch(f'author:{instance.author.username}',
+                         f'author:{instance.user.username}')
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_graph.record_unfollow(instance.user_id, instance.author_id)
+    recommendations.follow_changed.delay([instance.user_id])
+    timeline.sync_follow.delay(instance.user_id, instance.author_id)
+    stats.bump(instance.author_id, followers_count=-1)
+    stats.bump(instance.user_id, following_count=-1)
+    watermarks.touch(f'author:{instance.author.username}',
+                     f'author:{instance.user.username}')
+
+
+def _touch_comment_post(comment):
+    # Счётчик комментариев виден на карточке поста во всех лентах.
+    post = Post.objects.filter(pk=comment.post_id).values(
+        'author__username', 'group__slug').first()
+    if post is not None:
+        watermarks.touch(*watermarks.post_scopes(
+            comment.post_id, post['author__username'], post['group__slug']))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        fulltext.update.delay('comment', instance.pk)
+        _touch_comment_post(instance)
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1,
+            version=F('version') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    fulltext.update.delay('comment', instance.pk)
+    _touch_comment_post(instance)
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        version=F('version') + 1)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    hot_groups.forget_group(instance)
+    if not created:
+        instance.posts.update(version=F('version') + 1)
+        watermarks.touch('groups', f'group:{instance.slug}')
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    instance.posts.update(version=F('version') + 1)
+    watermarks.touch('groups', f'group:{instance.slug}')
+    hot_groups.forget_group(instance)
@@ -0,0 +1,63 @@
+"""Денормализованные счётчики профиля (``UserStats``).
+
+Счётчики меняются атомарными ``F()``-обновлениями из сигналов
+``Post`` и ``Follow``; ``reconcile`` пересчитывает их по исходным
+таблицам и используется при первом обращении и периодической сверке.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Follow, Post, User, UserStats
+
+COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def _count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()), 0)
+
+
+def bump(user_id, **deltas):
+    """Изменить счётчики пользователя на ``deltas`` одним UPDATE."""
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+    if not updated:
+        reconcile(User.objects.filter(pk=user_id))
+
+
+def reconcile(users=None):
+    """Пересчитать счётчики и вернуть число исправленных строк."""
+    users = User.objects.all() if users is None else users
+    users = users.annotate(**{
+        f'{field}_actual': _count(model, lookup)
+        for field, (model, lookup) in COUNTERS.items()
+    }).select_related('stats')
+    fixed = 0
+    for user in users.iterator():
+        actual = {field: getattr(user, f'{field}_actual')
+                  for field in COUNTERS}
+        stats = getattr(user, 'stats', None)
+        if stats is not None and all(
+                getattr(stats, field) == value
+                for field, value in actual.items()):
+            continue
+        UserStats.objects.update_or_create(user=user, defaults=actual)
+        fixed += 1
+    return fixed
+
+
+def for_user(user):
+    """Счётчики пользователя, создаются при первом обращении."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        reconcile(User.objects.filter(pk=user.pk))
+        return UserStats.objects.get(user=user)
@@ -0,0 +1,108 @@
+"""Стеммер русского языка по алгоритму Snowball (Портер).
+
+Нужен поиску, чтобы «котов», «коты» и «кот» попадали в один терм
+индекса. Слова на латинице только приводятся к нижнему регистру.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('вшись', 1), ('вши', 1), ('в', 1),
+    ('ившись', 2), ('ывшись', 2), ('ивши', 2), ('ывши', 2),
+    ('ив', 2), ('ыв', 2),
+)
+REFLEXIVE = (('ся', 2), ('сь', 2))
+ADJECTIVE = tuple((ending, 2) for ending in (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое',
+    'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую',
+    'юю', 'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (
+    ('ем', 1), ('нн', 1), ('вш', 1), ('ющ', 1), ('щ', 1),
+    ('ивш', 2), ('ывш', 2), ('ующ', 2),
+)
+VERB = tuple((ending, 1) for ending in (
+    'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+    'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+)) + tuple((ending, 2) for ending in (
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+    'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+    'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+))
+NOUN = tuple((ending, 2) for ending in (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+))
+DERIVATIONAL = (('ость', 2), ('ост', 2))
+SUPERLATIVE = (('ейше', 2), ('ейш', 2))
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _region(word, start=0):
+    """Начало области после первой пары «гласная + согласная»."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _strip(word, rv, endings):
+    """Отрезать самое длинное окончание из ``endings`` внутри RV.
+
+    Окончания первой группы допускаются только после «а» или «я».
+    Возвращает ``None``, если подходящего окончания нет.
+    """
+    for ending, group in sorted(endings, key=lambda item: -len(item[0])):
+        stem_length = len(word) - len(ending)
+        if not word.endswith(ending) or stem_length < rv:
+            continue
+        if group == 1 and (stem_length - 1 < rv
+                           or word[stem_length - 1] not in 'ая'):
+            return None
+        return word[:stem_length]
+    return None
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv = next((i + 1 for i, char in enumerate(word) if char in VOWELS),
+              len(word))
+    r2 = _region(word, _region(word))
+
+    # Шаг 1: деепричастие, иначе возвратность и прилагательное/глагол/сущ.
+    stripped = _strip(word, rv, PERFECTIVE_GERUND)
+    if stripped is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        stripped = _strip(word, rv, ADJECTIVE)
+        if stripped is not None:
+            stripped = _strip(stripped, rv, PARTICIPLE) or stripped
+        else:
+            stripped = (_strip(word, rv, VERB)
+                        or _strip(word, rv, NOUN))
+    word = stripped or word
+
+    # Шаг 2: конечная «и».
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3: словообразовательный суффикс в R2.
+    word = _strip(word, r2, DERIVATIONAL) or word
+
+    # Шаг 4: превосходная степень, двойная «н» или мягкий знак.
+    stripped = _strip(word, rv, SUPERLATIVE)
+    if stripped is not None:
+        word = stripped
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        word = word[:-1]
+    elif stripped is None and word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Разбить текст на стеммированные термы."""
+    return [stem(word) for word in WORD_RE.findall(text)]
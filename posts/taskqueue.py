@@ -0,0 +1,125 @@
+"""Очередь фоновых задач в базе данных.
+
+Функция, помеченная ``@task``, получает метод ``delay(*args)``. Он
+записывает ``Task`` в той же транзакции, что и породившее задачу
+изменение, поэтому задача не теряется при откате и не выполняется
+раньше коммита. Аргументы хранятся в JSON: задачам передаются id, а не
+объекты.
+
+Задачи выполняет команда ``run_tasks``; воркеров может быть несколько,
+задача достаётся одному из них условным ``UPDATE``. Упавшая задача
+повторяется с экспоненциальной задержкой, пока не кончатся
+``TASKS_MAX_ATTEMPTS`` попыток. С ``TASKS_ALWAYS_EAGER`` задачи
+выполняются сразу внутри ``delay`` — для разработки и тестов — в своей
+точке сохранения: ошибка задачи откатывает только её и не ломает
+транзакцию вызывающего кода.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func):
+    """Зарегистрировать функцию как задачу и добавить ей ``delay``."""
+    name = f'{func.__module__}.{func.__name__}'
+    _registry[name] = func
+
+    def delay(*args):
+        if settings.TASKS_ALWAYS_EAGER:
+            try:
+                with transaction.atomic():
+                    func(*args)
+            except Exception:
+                logger.exception('Задача %s%r не удалась', name, args)
+            return None
+        return Task.objects.create(name=name, args=json.dumps(args))
+
+    func.delay = delay
+    func.task_name = name
+    return func
+
+
+def _resolve(name):
+    if name not in _registry:
+        # Задача регистрируется при импорте своего модуля.
+        import_string(name)
+    return _registry[name]
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(limit):
+    """Забрать до ``limit`` готовых к выполнению задач."""
+    now = timezone.now()
+    # Задачи воркера, который умер посреди работы, снова в очереди.
+    Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT),
+    ).update(status=Task.PENDING, locked_at=None)
+    candidates = list(Task.objects.filter(
+        status=Task.PENDING, run_after__lte=now,
+    ).values_list('pk', flat=True)[:limit])
+    claimed = [
+        pk for pk in candidates
+        if Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING, locked_at=now)
+    ]
+    return list(Task.objects.filter(pk__in=claimed))
+
+
+def execute(item):
+    """Выполнить задачу и записать результат. Вернуть ``True`` при успехе."""
+    item.attempts += 1
+    try:
+        with transaction.atomic():
+            _resolve(item.name)(*json.loads(item.args))
+    except Exception:
+        logger.exception('Задача %s не удалась', item)
+        item.last_error = traceback.format_exc()
+        if item.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            item.status = Task.FAILED
+            item.finished = timezone.now()
+        else:
+            item.status = Task.PENDING
+            item.run_after = timezone.now() + _retry_delay(item.attempts)
+    else:
+        item.status = Task.DONE
+        item.finished = timezone.now()
+    item.locked_at = None
+    item.save(update_fields=['attempts', 'status', 'run_after', 'finished',
+                             'locked_at', 'last_error'])
+    return item.status == Task.DONE
+
+
+def run_pending(limit=100):
+    """Выполнить порцию задач: вернуть ``(успешных, неудачных)``."""
+    done = failed = 0
+    for item in claim(limit):
+        close_old_connections()
+        if execute(item):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def purge():
+    """Удалить выполненные задачи старше ``TASKS_KEEP_DONE`` секунд."""
+    border = timezone.now() - timedelta(seconds=settings.TASKS_KEEP_DONE)
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE, finished__lt=border).delete()
+    return deleted
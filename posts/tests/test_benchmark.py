@@ -0,0 +1,48 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import benchmark
+from posts.models import Comment, Post, TimelineEntry
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def test_seed_fills_derived_data(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            counts = benchmark.seed(users=10, posts=40, groups=2,
+                                    comments=30, images=1)
+        self.assertEqual(counts['posts'], 40)
+        self.assertEqual(counts['images'], 1)
+        self.assertEqual(
+            sum(Post.objects.values_list('comment_count', flat=True)),
+            Comment.objects.count())
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def test_bench_writes_report(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            benchmark.seed(users=5, posts=20, groups=1, comments=10,
+                           images=0)
+            output = os.path.join(self.media_root, 'bench.json')
+            call_command('bench', requests=2, warmup=0, output=output,
+                         stdout=StringIO())
+        with open(output) as report:
+            results = json.load(report)['results']
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_view',
+            'follow_index', 'add_comment', 'new_post'})
+        for result in results.values():
+            self.assertTrue(all(code < 400 for code in result['status']))
+            self.assertGreater(result['queries']['max'], 0)
+        self.assertFalse(Post.objects.filter(
+            text='Пост из бенчмарка').exists())
@@ -0,0 +1,99 @@
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts import cache as posts_cache
+
+
+class SharedCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        posts_cache.reset_metrics()
+
+    def test_value_is_computed_once_and_counted(self):
+        calls = []
+        for _ in range(3):
+            value = posts_cache.get_or_set(
+                'answer', lambda: calls.append(1) or 42, timeout=60)
+        self.assertEqual(value, 42)
+        self.assertEqual(len(calls), 1)
+        metrics = posts_cache.metrics()
+        self.assertEqual((metrics['miss'], metrics['hit']), (1, 2))
+
+    @override_settings(POSTS_CACHE_BACKGROUND_REFRESH=False)
+    def test_stale_value_is_served_while_locked(self):
+        cache.set('answer', (41, time.time() - 1), 60)
+        cache.add('answer:lock', 1, 60)
+        value = posts_cache.get_or_set('answer', lambda: 42, timeout=60)
+        self.assertEqual(value, 41)
+        cache.delete('answer:lock')
+        posts_cache.get_or_set('answer', lambda: 42, timeout=60)
+        self.assertEqual(
+            posts_cache.get_or_set('answer', lambda: 43, timeout=60), 42)
+
+    def test_stale_value_is_refreshed_in_background(self):
+        cache.set('answer', (41, time.time() - 1), 60)
+        release, done = threading.Event(), threading.Event()
+
+        def slow():
+            release.wait(5)
+            done.set()
+            return 42
+
+        self.assertEqual(
+            posts_cache.get_or_set('answer', slow, timeout=60), 41)
+        release.set()
+        self.assertTrue(done.wait(5))
+        deadline = time.time() + 5
+        while cache.get('answer')[0] != 42 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(
+            posts_cache.get_or_set('answer', lambda: 43, timeout=60), 42)
+
+    @override_settings(POSTS_CACHE_LOCK_TIMEOUT=0.2)
+    def test_miss_falls_back_to_compute_when_lock_is_stuck(self):
+        cache.add('answer:lock', 1, 60)
+        self.assertEqual(
+            posts_cache.get_or_set('answer', lambda: 42, timeout=60), 42)
+
+    def test_concurrent_misses_are_coalesced(self):
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return 42
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            posts_cache.get_or_set('slow', slow, timeout=60)))
+            for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_cached_page_keeps_status_and_headers(self):
+        calls = []
+
+        @posts_cache.cached_page(60)
+        def view(request):
+            calls.append(1)
+            response = HttpResponse('нет такой', status=404)
+            response['X-Page'] = 'missing'
+            return response
+
+        request = RequestFactory().get('/missing/')
+        request.user = AnonymousUser()
+        view(request)
+        response = view(request)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['X-Page'], 'missing')
+        self.assertEqual(response.content.decode(), 'нет такой')
@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post, Group, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.user_second = User.objects.create_user(username='SashaBasov')
+        cls.authorized_client = Client()
+        cls.authorized_client_second = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.authorized_client_second.force_login(cls.user_second)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title='tester', slug='test', description='common')
+        self.post = Post.objects.create(
+            text='Старый текст', author=self.user, group=self.group)
+        self.url = reverse('group_posts', args=[self.group.slug])
+
+    def test_card_is_served_from_cache(self):
+        self.authorized_client_second.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        self.assertContains(
+            self.authorized_client_second.get(self.url), 'Старый текст')
+
+    def test_edit_and_comment_invalidate_card(self):
+        self.authorized_client_second.get(self.url)
+        self.authorized_client.post(
+            reverse('post_edit', args=[self.user.username, self.post.pk]),
+            {'text': 'Новый текст', 'group': self.group.pk})
+        self.authorized_client_second.post(
+            reverse('add_comment', args=[self.user.username, self.post.pk]),
+            {'text': 'коммент'})
+        response = self.authorized_client_second.get(self.url)
+        self.assertContains(response, 'Новый текст')
+        self.assertContains(response, 'Комментарии: 1')
+
+    def test_group_rename_invalidates_card(self):
+        self.authorized_client_second.get(self.url)
+        self.group.title = 'renamed'
+        self.group.save()
+        self.assertContains(
+            self.authorized_client_second.get(self.url), '#renamed')
+
+    def test_edit_link_only_for_author(self):
+        edit_url = reverse('post_edit', args=[self.user.username, self.post.pk])
+        self.assertNotContains(
+            self.authorized_client_second.get(self.url), edit_url)
+        self.assertContains(self.authorized_client.get(self.url), edit_url)
+        self.assertNotContains(Client().get(self.url), edit_url)
+
+    def test_saving_stale_post_keeps_counters(self):
+        self.post.comments.create(author=self.user_second, text='коммент')
+        self.post.text = 'Правка'
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.version, 2)
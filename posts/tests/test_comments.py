@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.post = Post.objects.create(text='Популярный пост', author=cls.user)
+        for number in range(7):
+            Comment.objects.create(post=cls.post, author=cls.user,
+                                   text=f'Комментарий {number}')
+        cls.url = reverse('post', args=[cls.user.username, cls.post.pk])
+        cls.json_url = reverse('post_comments',
+                               args=[cls.user.username, cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_page_shows_newest_comments(self):
+        response = self.client.get(self.url)
+        comments = response.context['comments']
+        self.assertIsInstance(comments, QuerySet)
+        self.assertEqual([comment.text for comment in comments],
+                         ['Комментарий 6', 'Комментарий 5', 'Комментарий 4'])
+        self.assertContains(response, response.context['comments_next'])
+
+    def test_older_comments_are_loaded_by_cursor(self):
+        cursor = self.client.get(self.url).context['comments_next']
+        pages = []
+        while cursor:
+            data = self.client.get(self.json_url, {'after': cursor}).json()
+            pages.append(data['html'])
+            cursor = data['next']
+        self.assertEqual(len(pages), 2)
+        html = ''.join(pages)
+        for comment in Comment.objects.filter(post=self.post):
+            anchor = f'name="comment_{comment.pk}"'
+            if comment.text < 'Комментарий 4':
+                self.assertIn(anchor, html)
+            else:
+                self.assertNotIn(anchor, html)
+
+    def test_comment_page_cost_does_not_depend_on_comment_count(self):
+        with self.assertNumQueries(2):
+            self.client.get(self.json_url)
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text='ещё')
+            for _ in range(50))
+        with self.assertNumQueries(2):
+            self.client.get(self.json_url)
@@ -0,0 +1,122 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts import watermarks
+from posts.models import Comment, Follow, Group, Post, User
+from yatube import replicas
+
+
+# Кэш в памяти процесса в тестах общий: другого процесса нет.
+@override_settings(WATERMARKS_ENABLED=True)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title='Котики', slug='cats', description='Про котиков')
+        self.post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group)
+
+    def assertNotModified(self, url, etag, client=None):
+        response = (client or self.client).get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def assertModified(self, url, etag, client=None):
+        response = (client or self.client).get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_modified_index_skips_queries(self):
+        url = reverse('index')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertNotModified(url, etag)
+        Post.objects.create(text='Новый пост', author=self.user)
+        self.assertModified(url, etag)
+
+    def test_cached_index_follows_new_etag(self):
+        url = reverse('index')
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(text='Новый пост', author=self.user)
+        response = self.client.get(url)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Новый пост')
+
+    def test_etag_depends_on_viewer(self):
+        url = reverse('index')
+        etag = self.client.get(url)['ETag']
+        self.assertModified(url, etag, self.reader_client)
+
+    def test_group_page_changes_when_post_moves_away(self):
+        url = reverse('group_posts', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, etag)
+        self.post.group = None
+        self.post.save()
+        self.assertModified(url, etag)
+
+    def test_profile_changes_on_follow(self):
+        url = reverse('profile', args=[self.user.username])
+        etag = self.client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertModified(url, etag)
+
+    def test_post_page_changes_on_comment(self):
+        url = reverse('post', args=[self.user.username, self.post.pk])
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertNotModified(url, response['ETag'])
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        self.assertModified(url, response['ETag'])
+
+    def test_group_rename_changes_every_page(self):
+        url = reverse('profile', args=[self.user.username])
+        etag = self.client.get(url)['ETag']
+        self.group.title = 'Коты'
+        self.group.save()
+        self.assertModified(url, etag)
+
+    def test_recent_change_reads_primary(self):
+        @watermarks.conditional(lambda request: ['all'])
+        def view(request):
+            return HttpResponse(replicas.current_replica() or 'default')
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        watermarks.touch('all')
+        replicas._state.replica = 'replica1'
+        self.assertEqual(view(request).content, b'default')
+        with self.settings(REPLICA_STICKY_SECONDS=-60):
+            request = RequestFactory().get('/')
+            request.user = self.user
+            replicas._state.replica = 'replica1'
+            self.assertEqual(view(request).content, b'replica1')
+        replicas._state.replica = None
+
+    def test_etag_changes_with_csrf_secret(self):
+        view = watermarks.conditional(lambda request: ['all'])(
+            lambda request: HttpResponse())
+        etags = []
+        for secret in ('old', 'new'):
+            request = RequestFactory().get('/', CSRF_COOKIE=secret)
+            request.user = self.reader
+            etags.append(view(request)['ETag'])
+        self.assertNotEqual(*etags)
+
+    def test_scope_keys_are_hashed(self):
+        self.assertRegex(watermarks._key('author:имя с пробелом'),
+                         r'^watermark:[0-9a-f]{32}$')
+
+    @override_settings(WATERMARKS_ENABLED=None)
+    def test_process_local_cache_disables_watermarks(self):
+        response = self.client.get(reverse('index'))
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+
+
+class EdgeCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title='Котики', slug='cats', description='Про котиков')
+        self.post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group)
+        self.own = Post.objects.create(text='Свой', author=self.reader)
+        self.urls = [
+            reverse('index'),
+            reverse('group_posts', args=[self.group.slug]),
+            reverse('profile', args=[self.user.username]),
+            reverse('post', args=[self.user.username, self.post.pk]),
+        ]
+
+    def test_anonymous_pages_are_public_shells(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage=60', response['Cache-Control'])
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+                self.assertFalse(response.cookies)
+                self.assertContains(response, reverse('viewer'))
+
+    @override_settings(WATERMARKS_ENABLED=True)
+    def test_not_modified_shell_is_public(self):
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_authenticated_pages_are_private(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                self.assertNotContains(response, reverse('viewer'))
+
+    def test_viewer_for_anonymous(self):
+        response = self.client.get(reverse('viewer'))
+        self.assertEqual(response.json(), {'username': None})
+
+    def test_viewer_fills_personal_data(self):
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.reader_client.get(reverse('viewer'), {
+            'posts': f'{self.post.pk},{self.own.pk},x',
+            'author': self.user.username,
+        })
+        data = response.json()
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual(data['username'], self.reader.username)
+        self.assertEqual(data['editable'], {
+            str(self.own.pk): self.own.get_edit_url()})
+        self.assertTrue(data['following'])
+        self.assertTrue(data['csrf_token'])
+
+    def test_viewer_does_not_shadow_profile(self):
+        User.objects.create_user(username='viewer')
+        response = self.client.get(reverse('profile', args=['viewer']))
+        self.assertEqual(response.context['author'].username, 'viewer')
@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow, User
+
+
+# Кэш в памяти процесса в тестах общий для всех «процессов»: граф
+# включается явно. Правки публикуются после коммита, поэтому нужны
+# настоящие транзакции.
+@override_settings(FOLLOW_GRAPH_ENABLED=True)
+class FollowGraphTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [User.objects.create_user(username=f'author{number}')
+                        for number in range(3)]
+
+    def test_lookups_follow_signals_without_queries(self):
+        follow_graph.graph()
+        for author in reversed(self.authors):
+            Follow.objects.create(user=self.reader, author=author)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.reader.pk, self.authors[1].pk))
+            self.assertEqual(list(follow_graph.following(self.reader.pk)),
+                             [author.pk for author in self.authors])
+            self.assertEqual(
+                follow_graph.followers_count(self.authors[0].pk), 1)
+        Follow.objects.filter(author=self.authors[1]).delete()
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                follow_graph.is_following(self.reader.pk, self.authors[1].pk))
+            self.assertEqual(follow_graph.following_count(self.reader.pk), 2)
+
+    def test_graph_reloads_when_changes_are_lost(self):
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        follow_graph.graph()
+        cache.clear()
+        # bulk_create не вызывает сигналы: правка до графа не дошла.
+        Follow.objects.bulk_create(
+            [Follow(user=self.reader, author=self.authors[1])])
+        with self.assertNumQueries(1):
+            self.assertEqual(follow_graph.following_count(self.reader.pk), 2)
+
+    def test_profile_reads_follow_state_from_graph(self):
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        self.client.force_login(self.reader)
+        response = self.client.get(
+            reverse('profile', args=[self.authors[0].username]))
+        self.assertTrue(response.context['following'])
+
+    def test_rolled_back_follow_is_not_published(self):
+        follow_graph.graph()
+        try:
+            with transaction.atomic():
+                Follow.objects.create(user=self.reader, author=self.authors[0])
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        self.assertFalse(
+            follow_graph.is_following(self.reader.pk, self.authors[0].pk))
+
+
+class DisabledFollowGraphTests(TestCase):
+    def test_process_local_cache_reads_follows_from_database(self):
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        self.assertFalse(follow_graph.enabled())
+        Follow.objects.create(user=reader, author=author)
+        with self.assertNumQueries(1):
+            self.assertTrue(follow_graph.is_following(reader.pk, author.pk))
+        self.assertEqual(list(follow_graph.followers(author.pk)), [reader.pk])
@@ -0,0 +1,56 @@
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import follows
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class BulkFollowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f'user{number}')
+                     for number in range(4)]
+        cls.post = Post.objects.create(text='Пост', author=cls.users[1])
+
+    def test_follow_many_runs_follow_side_effects(self):
+        reader, author = self.users[0], self.users[1]
+        pairs = [(reader.pk, author.pk), (reader.pk, author.pk),
+                 (reader.pk, reader.pk)]
+        self.assertEqual(follows.follow_many(pairs), 1)
+        self.assertEqual(follows.follow_many(pairs), 0)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=reader, post=self.post).exists())
+        author.stats.refresh_from_db()
+        self.assertEqual(author.stats.followers_count, 1)
+
+    @override_settings(FOLLOW_DELETE_CHUNK_SIZE=300)
+    def test_unfollow_many_at_batch_limit(self):
+        reader = self.users[0]
+        User.objects.bulk_create(
+            [User(username=f'author{number}')
+             for number in range(settings.API_FOLLOW_BATCH_LIMIT)])
+        pairs = [(reader.pk, pk) for pk in User.objects.filter(
+            username__startswith='author').values_list('pk', flat=True)]
+        follows.follow_many(pairs)
+        self.assertEqual(follows.unfollow_many(pairs),
+                         settings.API_FOLLOW_BATCH_LIMIT)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_import_command_reports_throughput(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as source:
+            source.write('user0,user1\nuser0,user2\nuser3,user3\n'
+                         'user0,nobody\nuser2,user1\n')
+            source.flush()
+            out = StringIO()
+            call_command('import_follows', source.name, chunk=2, stdout=out)
+        self.assertIn('Пар: 5, новых подписок: 3', out.getvalue())
+        self.assertIn('пар в секунду', out.getvalue())
+        self.assertEqual(
+            set(Follow.objects.values_list('user__username',
+                                           'author__username')),
+            {('user0', 'user1'), ('user0', 'user2'), ('user2', 'user1')})
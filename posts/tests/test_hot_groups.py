@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import hot_groups
+from posts.models import Group, Post, User
+
+
+# Кэш в памяти процесса в тестах общий: другого процесса нет.
+@override_settings(GROUP_HOT_ENABLED=True, GROUP_HOT_SIZE=5,
+                   POSTS_PER_PAGE=2)
+class HotGroupPagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.group = Group.objects.create(
+            title='tester', slug='test', description='common')
+        cls.other = Group.objects.create(
+            title='other', slug='other', description='other')
+        for number in range(7):
+            Post.objects.create(text=f'Пост {number}', author=cls.user,
+                                group=cls.group)
+        cls.url = reverse('group_posts', args=[cls.group.slug])
+
+    def setUp(self):
+        cache.clear()
+
+    def texts(self, response):
+        return [post.text for post in response.context['page']]
+
+    def test_warm_first_page_skips_sorting_query(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(self.texts(response), ['Пост 6', 'Пост 5'])
+        for query in queries:
+            self.assertNotIn('ORDER BY', query['sql'])
+
+    def test_new_post_appears_on_warm_page(self):
+        self.client.get(self.url)
+        Post.objects.create(text='Свежий', author=self.user, group=self.group)
+        response = self.client.get(self.url)
+        self.assertEqual(self.texts(response), ['Свежий', 'Пост 6'])
+
+    def test_deleted_and_moved_posts_leave_the_page(self):
+        self.client.get(self.url)
+        Post.objects.get(text='Пост 6').delete()
+        moved = Post.objects.get(text='Пост 5')
+        moved.group = self.other
+        moved.save()
+        response = self.client.get(self.url)
+        self.assertEqual(self.texts(response), ['Пост 4', 'Пост 3'])
+        response = self.client.get(
+            reverse('group_posts', args=[self.other.slug]))
+        self.assertEqual(self.texts(response), ['Пост 5'])
+
+    def test_stale_list_heals_itself(self):
+        self.client.get(self.url)
+        # update() обходит сигналы: список в кэше устарел.
+        Post.objects.filter(text='Пост 6').update(group=None)
+        response = self.client.get(self.url)
+        self.assertEqual(self.texts(response), ['Пост 5', 'Пост 4'])
+
+    def test_cursor_pages_cover_the_whole_group(self):
+        texts, params = [], {}
+        while True:
+            response = self.client.get(self.url, params)
+            texts += self.texts(response)
+            cursor = response.context['page'].next_cursor
+            if not cursor:
+                break
+            params = {'after': cursor}
+        self.assertEqual(
+            texts, [f'Пост {number}' for number in range(6, -1, -1)])
+
+    @override_settings(GROUP_HOT_ENABLED=None)
+    def test_process_local_cache_disables_hot_lists(self):
+        self.assertIsNone(hot_groups.for_group(self.group.pk))
+        # Правка из «другого процесса» сразу видна на странице.
+        Post.objects.bulk_create(
+            [Post(text='Свежий', author=self.user, group=self.group)])
+        response = self.client.get(self.url)
+        self.assertEqual(self.texts(response), ['Свежий', 'Пост 6'])
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.posts = [Post.objects.create(text=f'Пост {i}', author=cls.user)
+                     for i in range(20)]
+        cls.client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_page(self, url=None, **params):
+        url = url or reverse('profile', args=[self.user.username])
+        return self.client.get(url, params).context['page']
+
+    def test_cursor_walks_feed_without_gaps(self):
+        seen = []
+        page = self.get_page()
+        while True:
+            seen.extend(page.object_list)
+            if not page.next_cursor:
+                break
+            page = self.get_page(after=page.next_cursor)
+        self.assertEqual(seen, self.posts[::-1])
+        self.assertEqual(page.number, 3)
+
+    def test_before_cursor_returns_previous_page(self):
+        first = self.get_page()
+        second = self.get_page(after=first.next_cursor)
+        back = self.get_page(before=second.previous_cursor)
+        self.assertEqual(list(back.object_list), list(first.object_list))
+        self.assertEqual(back.number, 1)
+        self.assertIsNone(back.previous_cursor)
+
+    def test_legacy_page_number_and_broken_cursor(self):
+        second = self.get_page(after=self.get_page().next_cursor)
+        self.assertEqual(list(self.get_page(page=2).object_list),
+                         list(second.object_list))
+        self.assertEqual(list(self.get_page(after='bla').object_list),
+                         self.posts[:-9:-1])
+
+    @override_settings(PAGINATOR_MAX_PAGE=2)
+    def test_deep_page_numbers_need_cursor(self):
+        url = reverse('profile', args=[self.user.username])
+        self.assertEqual(self.client.get(url, {'page': 3}).status_code, 404)
+        first = self.get_page()
+        self.assertEqual(first.page_links, [1, 2])
+        third = self.get_page(
+            after=self.get_page(after=first.next_cursor).next_cursor)
+        self.assertEqual(third.number, 3)
+        self.assertEqual(third.page_links, [1, 2, 3])
+
+    @override_settings(PAGINATOR_ESTIMATE_COUNT=False)
+    def test_cursor_page_runs_no_count(self):
+        cursor = self.get_page(reverse('index')).next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            page = self.get_page(reverse('index'), after=cursor)
+        self.assertEqual(page.page_links, [])
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in queries.captured_queries))
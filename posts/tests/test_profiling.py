@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import profiling
+from posts.models import Post, User
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.staff = User.objects.create_user(username='admin', is_staff=True)
+        cls.staff_client = Client()
+        cls.staff_client.force_login(cls.staff)
+
+    def setUp(self):
+        cache.clear()
+        profiling.clear()
+        Post.objects.create(text='Пост для замера', author=self.user)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_request_is_recorded(self):
+        response = self.staff_client.get(
+            reverse('profile', args=[self.user.username]))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        sample, = profiling.samples()
+        self.assertEqual(sample.view, 'profile')
+        self.assertEqual(sample.status, 200)
+        self.assertGreater(sample.queries, 0)
+        self.assertGreater(sample.template_ms, 0)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_server_timing_is_staff_only(self):
+        response = self.client.get(reverse('index'))
+        self.assertNotIn('Server-Timing', response)
+        with self.settings(PERF_SERVER_TIMING=True):
+            response = self.client.get(reverse('index'))
+        self.assertIn('Server-Timing', response)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_card_fragments_are_counted(self):
+        url = reverse('profile', args=[self.user.username])
+        self.client.get(url)
+        self.client.get(url, {'after': ''})
+        first, second = profiling.samples()
+        # Счётчик страниц и карточка поста.
+        self.assertEqual((first.cache_hits, first.cache_misses), (0, 2))
+        self.assertEqual((second.cache_hits, second.cache_misses), (2, 0))
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_recorded(self):
+        response = self.client.get(reverse('index'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(profiling.samples(), [])
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_perf_page_is_staff_only(self):
+        self.client.get(reverse('index'))
+        response = self.client.get(reverse('perf_stats'))
+        self.assertEqual(response.status_code, 302)
+        response = self.staff_client.get(
+            reverse('perf_stats'), {'format': 'json'})
+        views = [row['view'] for row in response.json()['views']]
+        self.assertIn('index', views)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import Post, Group, Comment, Follow, User
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='SashaBasov')
+        cls.group = Group.objects.create(
+            title='tester', slug='test', description='common')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(10):
+            post = Post.objects.create(
+                text=f'Пост {i}', author=cls.user, group=cls.group)
+            Comment.objects.create(post=post, author=cls.reader, text='да')
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertQueryBudget(self, url, budget):
+        with self.assertNumQueries(budget):
+            response = self.reader_client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_index(self):
+        self.assertQueryBudget(reverse('index'), 4)
+
+    def test_group_posts(self):
+        self.assertQueryBudget(
+            reverse('group_posts', args=[self.group.slug]), 5)
+
+    def test_profile(self):
+        self.assertQueryBudget(
+            reverse('profile', args=[self.user.username]), 6)
+
+    def test_follow_index(self):
+        # Ещё один запрос — блок рекомендаций «Кого почитать».
+        self.assertQueryBudget(reverse('follow_index'), 6)
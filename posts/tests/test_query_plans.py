@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, Group, Comment, Follow, User
+
+FEED_TABLES = ('posts_post', 'posts_comment', 'posts_timelineentry')
+
+
+class FeedQueryPlanTests(TestCase):
+    """Ленты читаются по индексу, без полного прохода и сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='SashaBasov')
+        cls.group = Group.objects.create(
+            title='tester', slug='test', description='common')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(20):
+            post = Post.objects.create(
+                text=f'Пост {i}', author=cls.user, group=cls.group)
+        Comment.objects.create(post=post, author=cls.reader, text='да')
+        cls.post = post
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def feed_queries(self, url):
+        first = self.reader_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.reader_client.get(url)
+            if first.context.get('page') is not None:
+                self.reader_client.get(
+                    url, {'after': first.context['page'].next_cursor})
+        return [query['sql'] for query in queries.captured_queries
+                if query['sql'].startswith('SELECT')
+                and any(table in query['sql'] for table in FEED_TABLES)]
+
+    def assertIndexedPlans(self, url):
+        queries = self.feed_queries(url)
+        self.assertTrue(queries)
+        with connection.cursor() as cursor:
+            for sql in queries:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+                with self.subTest(url=url, sql=sql, plan=plan):
+                    self.assertFalse(
+                        [step for step in plan
+                         if 'TEMP B-TREE' in step
+                         or step.split()[:1] == ['SCAN']
+                         and 'INDEX' not in step
+                         and step.split()[1] in FEED_TABLES])
+
+    def test_index(self):
+        cache.clear()
+        self.assertIndexedPlans(reverse('index'))
+
+    def test_group_posts(self):
+        self.assertIndexedPlans(
+            reverse('group_posts', args=[self.group.slug]))
+
+    def test_profile(self):
+        self.assertIndexedPlans(
+            reverse('profile', args=[self.user.username]))
+
+    def test_follow_index(self):
+        self.assertIndexedPlans(reverse('follow_index'))
+
+    def test_post_view(self):
+        self.assertIndexedPlans(
+            reverse('post', args=[self.user.username, self.post.pk]))
@@ -0,0 +1,64 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import recommendations
+from posts.models import (Follow, Recommendation, StaleRecommendations,
+                          User)
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.friend, cls.writer, cls.twin = [
+            User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'writer', 'twin')]
+        for user, author in ((cls.reader, cls.friend),
+                             (cls.friend, cls.writer),
+                             (cls.twin, cls.friend),
+                             (cls.twin, cls.writer)):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def suggested(self, user):
+        return list(Recommendation.objects.filter(user=user).values_list(
+            'author__username', flat=True))
+
+    def test_friends_of_friends_and_co_followers(self):
+        self.assertEqual(recommendations.refresh(), 3)
+        self.assertEqual(self.suggested(self.reader), ['writer'])
+        self.assertEqual(self.suggested(self.friend), [])
+        self.assertFalse(StaleRecommendations.objects.exists())
+        score = Recommendation.objects.get(user=self.reader).score
+        # Путь через friend плюс похожий на reader подписчик twin.
+        self.assertGreater(score, 1)
+
+    def test_co_follow_uses_only_most_similar_users(self):
+        with self.settings(RECOMMENDATIONS_SIMILAR_USERS=0):
+            recommendations.refresh()
+        # Остался только путь через friend.
+        self.assertEqual(Recommendation.objects.get(user=self.reader).score, 1)
+
+    def test_only_stale_users_are_recomputed(self):
+        recommendations.refresh(everyone=True)
+        Follow.objects.create(user=self.writer, author=self.twin)
+        self.assertEqual(
+            set(StaleRecommendations.objects.values_list(
+                'user__username', flat=True)),
+            {'writer', 'friend', 'twin'})
+        out = StringIO()
+        call_command('recommend', stdout=out)
+        self.assertIn('Пересчитано пользователей: 3', out.getvalue())
+        self.assertEqual(self.suggested(self.friend), ['twin'])
+
+    def test_follow_index_shows_recommendations(self):
+        recommendations.refresh()
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('follow_index'))
+        self.assertContains(response, 'Кого почитать')
+        self.assertContains(response, reverse('profile', args=['writer']))
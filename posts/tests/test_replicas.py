@@ -0,0 +1,57 @@
+from django.contrib.sessions.models import Session
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve
+
+from posts.models import Post
+from yatube.replicas import ReplicaMiddleware
+
+
+@override_settings(REPLICA_DATABASES=['replica1', 'replica2'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def route(self, method, path, cookies=None, status=200):
+        """Прогнать запрос через middleware и вернуть выбранные базы."""
+        seen = {}
+
+        def view(request):
+            seen['post'] = router.db_for_read(Post)
+            seen['session'] = router.db_for_read(Session)
+            seen['write'] = router.db_for_write(Post)
+            return HttpResponse(status=status)
+
+        request = getattr(RequestFactory(), method)(path)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(path)
+        middleware = ReplicaMiddleware(view)
+        middleware.process_view(request, view, (), {})
+        response = middleware(request)
+        seen['after'] = router.db_for_read(Post)
+        return seen, response
+
+    def test_feed_reads_go_to_replica(self):
+        seen, _ = self.route('get', '/')
+        self.assertIn(seen['post'], ('replica1', 'replica2'))
+        self.assertEqual(seen['session'], 'default')
+        self.assertEqual(seen['write'], 'default')
+        self.assertEqual(seen['after'], 'default')
+
+    def test_other_views_read_primary(self):
+        seen, _ = self.route('get', '/new/')
+        self.assertEqual(seen['post'], 'default')
+
+    def test_write_makes_reads_sticky(self):
+        _, response = self.route('post', '/new/')
+        cookie = response.cookies['read_primary']
+        self.assertTrue(cookie['max-age'])
+        seen, _ = self.route('get', '/', cookies={'read_primary': '1'})
+        self.assertEqual(seen['post'], 'default')
+
+    def test_failed_write_is_not_sticky(self):
+        _, response = self.route('post', '/new/', status=400)
+        self.assertNotIn('read_primary', response.cookies)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas_configured(self):
+        seen, _ = self.route('get', '/')
+        self.assertEqual(seen['post'], 'default')
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User as AdminUser
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts import fulltext
+from posts.models import Post, Comment, User
+from posts.stemmer import stem
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        self.assertEqual(stem('коты'), stem('котов'))
+        self.assertEqual(stem('публикации'), stem('публикация'))
+        self.assertEqual(stem('Ёжики'), stem('ежиков'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.client_anon = Client()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Коты спят на диване', author=self.user)
+        self.other = Post.objects.create(
+            text='Собака гуляет во дворе', author=self.user)
+        self.comment = Comment.objects.create(
+            post=self.other, author=self.user, text='Мой кот тоже гуляет')
+
+    def test_finds_posts_and_comments_by_word_form(self):
+        results, _ = fulltext.find('котов')
+        self.assertEqual({(obj.search_kind, obj.pk) for obj in results},
+                         {('post', self.post.pk),
+                          ('comment', self.comment.pk)})
+
+    def test_index_follows_edits_and_deletes(self):
+        self.post.text = 'Теперь про птиц'
+        self.post.save()
+        self.comment.delete()
+        self.assertEqual(fulltext.find('кот')[0], [])
+        self.assertEqual([obj.pk for obj in fulltext.find('птица')[0]],
+                         [self.post.pk])
+
+    def test_cursor_pages_do_not_overlap(self):
+        for i in range(5):
+            Post.objects.create(text=f'Кот номер {i}', author=self.user)
+        first, cursor = fulltext.find('кот', per_page=4)
+        second, last = fulltext.find('кот', cursor, per_page=4)
+        self.assertIsNone(last)
+        self.assertEqual(len(first) + len(second), 7)
+        self.assertFalse({obj.pk for obj in first if obj.search_kind ==
+                          'post'} & {obj.pk for obj in second
+                                     if obj.search_kind == 'post'})
+
+    def test_search_page(self):
+        response = self.client_anon.get(reverse('search'), {'q': 'котами'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Коты спят на диване')
+        self.assertNotContains(response, 'Собака гуляет во дворе')
+
+    def test_search_does_not_shadow_profile(self):
+        User.objects.create_user(username='search')
+        response = self.client_anon.get(reverse('profile', args=['search']))
+        self.assertEqual(response.context['author'].username, 'search')
+
+    def test_admin_search_uses_index(self):
+        admin = AdminUser.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'диваном'})
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [self.post.pk])
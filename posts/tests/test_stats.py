@@ -0,0 +1,40 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Post, Follow, User, UserStats
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='SashaBasov')
+
+    def assertStats(self, user, posts, followers, following):
+        stats = UserStats.objects.get(user=user)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count,
+             stats.following_count),
+            (posts, followers, following)
+        )
+
+    def test_counters_follow_writes_and_deletes(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertStats(self.author, 1, 1, 0)
+        self.assertStats(self.user, 0, 0, 1)
+        follow.delete()
+        post.delete()
+        self.assertStats(self.author, 0, 0, 0)
+        self.assertStats(self.user, 0, 0, 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        Post.objects.create(text='Пост', author=self.author)
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        out = StringIO()
+        call_command('reconcile_stats', self.author.username, stdout=out)
+        self.assertStats(self.author, 1, 0, 0)
+        self.assertIn('1', out.getvalue())
@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from posts import uploads
+from posts.models import Post, User
+from yatube import storage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+
+
+def gif(name):
+    return SimpleUploadedFile(name, SMALL_GIF, 'image/gif')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='StasBasov')
+
+    def post(self, name):
+        return Post.objects.create(text='Мем', author=self.user,
+                                   image=gif(name))
+
+    def test_identical_uploads_share_one_file(self):
+        first, second = self.post('meme.gif'), self.post('copy.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name,
+                         r'^posts/[0-9a-f]{2}/[0-9a-f]{62}\.gif$')
+        path = first.image.path
+        first.delete()
+        self.assertEqual(uploads.sweep(grace=0), 0)
+        self.assertTrue(first.image.storage.exists(second.image.name))
+        second.delete()
+        # Запрос файл не удаляет: его убирает периодическая уборка.
+        self.assertTrue(first.image.storage.exists(second.image.name))
+        self.assertEqual(uploads.sweep(), 0)
+        call_command('sweep_media', grace=0, stdout=StringIO())
+        with self.assertRaises(FileNotFoundError):
+            open(path, 'rb')
+
+    def test_hashed_files_are_served_as_immutable(self):
+        name = self.post('meme.gif').image.name
+        request = RequestFactory().get(f'/media/{name}')
+        response = storage.serve(request, name, document_root=MEDIA_ROOT)
+        self.assertEqual(response['Cache-Control'],
+                         'public, immutable, max-age=31536000')
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import taskqueue
+from posts.models import Follow, Post, Task, TimelineEntry, User
+
+calls = []
+
+
+@taskqueue.task
+def flaky(value):
+    calls.append(value)
+    if value == 'fail':
+        raise ValueError('не вышло')
+
+
+@taskqueue.task
+def duplicate_user(username):
+    User.objects.create(username=username)
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False, TASKS_MAX_ATTEMPTS=2)
+class TaskQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+        Task.objects.all().delete()
+
+    def test_post_side_effects_run_in_worker(self):
+        self.author_client.post(reverse('new_post'), {'text': 'Фоновый'})
+        post = Post.objects.get(text='Фоновый')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(
+            set(Task.objects.values_list('name', flat=True)),
+            {'posts.fulltext.update', 'posts.timeline.fan_out'})
+        self.assertEqual(taskqueue.run_pending(), (2, 0))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+        self.assertEqual(taskqueue.run_pending(), (0, 0))
+
+    def test_failed_task_is_retried_then_given_up(self):
+        flaky.delay('fail')
+        with self.assertLogs('posts.taskqueue', 'ERROR'):
+            self.assertEqual(taskqueue.run_pending(), (0, 1))
+        item = Task.objects.get()
+        self.assertEqual((item.status, item.attempts), (Task.PENDING, 1))
+        self.assertIn('не вышло', item.last_error)
+        self.assertGreater(item.run_after, timezone.now())
+        self.assertEqual(taskqueue.run_pending(), (0, 0))
+
+        Task.objects.update(run_after=timezone.now())
+        with self.assertLogs('posts.taskqueue', 'ERROR'):
+            taskqueue.run_pending()
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.attempts), (Task.FAILED, 2))
+        self.assertEqual(calls, ['fail', 'fail'])
+
+    def test_task_of_dead_worker_is_requeued(self):
+        flaky.delay('ok')
+        Task.objects.update(status=Task.RUNNING, locked_at=timezone.now())
+        self.assertEqual(taskqueue.run_pending(), (0, 0))
+        Task.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(taskqueue.run_pending(), (1, 0))
+        self.assertEqual(calls, ['ok'])
+
+    def test_worker_command_drains_queue(self):
+        for value in ('a', 'b', 'c'):
+            flaky.delay(value)
+        call_command('run_tasks', once=True, stdout=StringIO())
+        self.assertEqual(calls, ['a', 'b', 'c'])
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+
+    def test_unfollow_before_backfill_leaves_feed_empty(self):
+        Post.objects.create(text='Старый пост', author=self.author)
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=other, author=self.author)
+        Follow.objects.filter(user=other).delete()
+        taskqueue.run_pending()
+        self.assertFalse(TimelineEntry.objects.filter(user=other).exists())
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode_runs_immediately(self):
+        flaky.delay('now')
+        with self.assertLogs('posts.taskqueue', 'ERROR'):
+            flaky.delay('fail')
+        self.assertEqual(calls, ['now', 'fail'])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_failure_keeps_caller_transaction(self):
+        with transaction.atomic():
+            with self.assertLogs('posts.taskqueue', 'ERROR'):
+                duplicate_user.delay(self.author.username)
+            Post.objects.create(text='После задачи', author=self.author)
+        self.assertTrue(Post.objects.filter(text='После задачи').exists())
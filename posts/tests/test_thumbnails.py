@@ -0,0 +1,75 @@
+import hashlib
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post, User
+
+SMALL_GIF = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+             b'\x01\x00\x80\x00\x00\x00\x00\x00'
+             b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+             b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+             b'\x0A\x00\x3B')
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def test_generate_fills_thumbnail_url(self):
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnail)
+        response = self.authorized_client.get(
+            reverse('profile', args=[self.user.username]))
+        self.assertContains(response, f'src="{self.post.thumbnail}"')
+
+    def test_page_without_thumbnail_skips_sorl(self):
+        response = self.authorized_client.get(
+            reverse('profile', args=[self.user.username]))
+        self.assertContains(response, f'src="{self.post.image.url}"')
+
+    def test_backfill_queues_missing_thumbnails(self):
+        call_command('backfill_thumbnails', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnail)
+
+    def test_new_image_resets_thumbnail(self):
+        thumbnails.generate(self.post.pk)
+        self.authorized_client.post(
+            reverse('post_edit', args=[self.user.username, self.post.pk]),
+            {'text': 'Новая картинка',
+             'image': SimpleUploadedFile('other.gif', SMALL_GIF, 'image/gif')})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail, '')
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
+        self.assertEqual(self.post.image.name,
+                         f'posts/{digest[:2]}/{digest[2:]}.gif')
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Group, Post, TrendingPost, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.group = Group.objects.create(
+            title='Котики', slug='cats', description='Про котиков')
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.user)
+        cls.hot = Post.objects.create(text='Обсуждаемый пост',
+                                      author=cls.user, group=cls.group)
+        for number in range(3):
+            Comment.objects.create(post=cls.hot, author=cls.user,
+                                   text=f'Комментарий {number}')
+
+    def score(self, post):
+        return TrendingPost.objects.get(post=post).score
+
+    def test_comments_raise_posts_and_groups(self):
+        self.assertEqual(trending.update(), (2, 1))
+        self.assertEqual(trending.top_posts(), [self.hot, self.quiet])
+        self.assertEqual([row.group for row in trending.top_groups()],
+                         [self.group])
+        self.assertAlmostEqual(self.score(self.hot),
+                               settings.TRENDING_POST_WEIGHT + 3, places=2)
+
+    def test_scores_decay_without_new_events(self):
+        trending.update()
+        before = self.score(self.hot)
+        later = timezone.now() + timedelta(
+            seconds=settings.TRENDING_HALF_LIFE)
+        with mock.patch('posts.trending.timezone.now', return_value=later):
+            self.assertEqual(trending.update(), (0, 0))
+        self.assertAlmostEqual(self.score(self.hot), before / 2, places=2)
+
+    def test_late_committed_events_are_counted_once(self):
+        trending.update()
+        before = self.score(self.quiet)
+        # Комментарий со временем до прошлого запуска, закоммиченный
+        # после него.
+        comment = Comment.objects.create(post=self.quiet, author=self.user,
+                                         text='Поздний')
+        Comment.objects.filter(pk=comment.pk).update(
+            created=TrendingPost.objects.get(post=self.quiet).computed
+            - timedelta(seconds=1))
+        self.assertEqual(trending.update(), (1, 0))
+        self.assertAlmostEqual(self.score(self.quiet), before + 1, places=2)
+        self.assertEqual(trending.update(), (0, 0))
+        self.assertAlmostEqual(self.score(self.quiet), before + 1, places=2)
+
+    def test_trending_page_reads_precomputed_list(self):
+        trending.update()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('trending'))
+        self.assertEqual(response.context['posts'], [self.hot, self.quiet])
+        self.assertContains(response, reverse('group_posts', args=['cats']))
+
+    def test_trending_does_not_shadow_profile(self):
+        User.objects.create_user(username='trending')
+        response = self.client.get(reverse('profile', args=['trending']))
+        self.assertEqual(response.context['author'].username, 'trending')
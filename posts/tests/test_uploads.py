@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts import uploads
+from posts.forms import PostForm
+from posts.models import Post, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def photo(width, height):
+    """JPEG с EXIF: ориентация «повернуть на 90°» и модель камеры."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x0110] = 'Телефон'
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(
+        buffer, 'JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, UPLOAD_MAX_SIDE=100)
+class UploadPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StasBasov')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_process_reencodes_and_strips_exif(self):
+        post = Post.objects.create(text='Фото', author=self.user,
+                                   image=photo(400, 200))
+        original = post.image.name
+        uploads.process(post.pk)
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.webp'))
+        # Исходник остаётся до уборки: на него мог сослаться другой пост.
+        self.assertTrue(post.image.storage.exists(original))
+        uploads.sweep(grace=0)
+        self.assertFalse(post.image.storage.exists(original))
+        self.assertTrue(post.image.storage.exists(post.image.name))
+        self.assertTrue(post.thumbnail)
+        with Image.open(post.image.path) as picture:
+            self.assertEqual(picture.format, 'WEBP')
+            # Повёрнута по ориентации и уменьшена по длинной стороне.
+            self.assertEqual(picture.size, (50, 100))
+            self.assertFalse(picture.getexif())
+
+    def test_form_rejects_heavy_file(self):
+        with self.settings(UPLOAD_MAX_BYTES=100):
+            form = PostForm({'text': 'Фото'}, {'image': photo(400, 200)})
+            self.assertFalse(form.is_valid())
+        self.assertTrue(form.errors['image'][0].startswith('Файл больше'))
+
+    def test_form_rejects_too_many_pixels(self):
+        with self.settings(UPLOAD_MAX_PIXELS=2 * 10 ** 6):
+            form = PostForm({'text': 'Фото'}, {'image': photo(2000, 1001)})
+            self.assertFalse(form.is_valid())
+        self.assertIn('2 мегапикселей', form.errors['image'][0])
@@ -1,12 +1,18 @@
+import shutil
+import tempfile
+
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 
 
 from posts.models import Post, Group, Comment, Follow, User
 
+MEDIA_ROOT = tempfile.mkdtemp()
+
 
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
 class StaticViewTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -19,6 +25,10 @@ class StaticViewTests(TestCase):
         cls.authorized_client_second.force_login(cls.user_second)
         cls.unauthorized_client = Client()
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
 
     def test_new_post(self):
         test_group = Group.objects.create(
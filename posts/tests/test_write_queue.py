@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import Future
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from posts import write_queue
+from posts.models import Comment, Post, User
+
+
+class WriteBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def comment(self, text):
+        return Comment.objects.create(post=self.post, author=self.user,
+                                      text=text)
+
+    def test_failed_write_does_not_break_batch(self):
+        def broken():
+            self.comment('откатится')
+            raise ValueError('ошибка')
+
+        batch = [(Future(), self.comment, ('первый',), {}),
+                 (Future(), broken, (), {}),
+                 (Future(), self.comment, ('второй',), {})]
+        write_queue.write(batch)
+        first, failed, second = (future for future, *_ in batch)
+        self.assertEqual(first.result().text, 'первый')
+        self.assertIsInstance(failed.exception(), ValueError)
+        self.assertEqual(second.result().text, 'второй')
+        self.assertEqual(
+            sorted(Comment.objects.values_list('text', flat=True)),
+            ['второй', 'первый'])
+
+    def test_disabled_queue_writes_inline(self):
+        self.assertEqual(write_queue.submit(self.comment, 'сразу').text,
+                         'сразу')
+
+
+@override_settings(WRITE_QUEUE_ENABLED=True)
+class WriterThreadTests(TransactionTestCase):
+    def test_concurrent_writes_are_committed(self):
+        user = User.objects.create_user(username='StasBasov')
+        post = Post.objects.create(text='Пост', author=user)
+        errors = []
+
+        def add(number):
+            try:
+                write_queue.submit(Comment.objects.create, post=post,
+                                   author=user, text=f'Комментарий {number}')
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=add, args=(number,))
+                   for number in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(Comment.objects.filter(post=post).count(), 10)
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 10)
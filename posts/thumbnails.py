@@ -0,0 +1,38 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+После обработки картинки (``posts.uploads``) все размеры из
+``settings.POST_THUMBNAILS`` генерируются фоновой задачей, а адрес
+миниатюры карточки записывается в ``Post.thumbnail``. Шаблон берёт
+готовый адрес из поля и к sorl.thumbnail не обращается: пока миниатюры
+нет, показывается сама картинка. Старым постам и постам с упавшей
+задачей миниатюры ставит в очередь команда ``backfill_thumbnails``.
+"""
+from django.conf import settings
+from django.db.models import F
+from sorl.thumbnail import get_thumbnail
+
+from . import watermarks
+from .models import Post
+from .taskqueue import task
+
+
+@task
+def generate(post_id):
+    """Сгенерировать миниатюры поста и запомнить адрес карточки."""
+    post = Post.objects.filter(pk=post_id).select_related(
+        'author', 'group').only(
+        'image', 'author__username', 'group__slug').first()
+    if post is None or not post.image:
+        return
+    urls = {
+        name: get_thumbnail(post.image, geometry, **options).url
+        for name, (geometry, options) in settings.POST_THUMBNAILS.items()
+    }
+    # Картинку могли заменить, пока миниатюры готовились.
+    updated = Post.objects.filter(
+        pk=post_id, image=post.image.name
+    ).update(thumbnail=urls['card'], version=F('version') + 1)
+    if updated:
+        watermarks.touch(*watermarks.post_scopes(
+            post_id, post.author.username,
+            post.group.slug if post.group_id else None))
@@ -0,0 +1,94 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+Лента каждого пользователя хранится в таблице ``TimelineEntry`` и
+заполняется фоновыми задачами сразу после записи: при публикации поста
+он раскладывается по лентам подписчиков автора, при подписке в ленту
+копируются последние посты автора, при отписке они из неё удаляются.
+"""
+from django.conf import settings
+
+from . import follow_graph
+from .models import Follow, Post, TimelineEntry
+from .taskqueue import task
+
+
+def _entries(user_ids, post):
+    return (TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in user_ids)
+
+
+def _bulk_insert(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= settings.TIMELINE_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+@task
+def fan_out(post_id):
+    """Разложить новый пост по лентам всех подписчиков автора."""
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'pub_date').first()
+    if post is None:
+        return
+    # Граф процесса воркера мог не увидеть свежие подписки: база точнее.
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        'user_id', flat=True)
+    _bulk_insert(_entries(followers.iterator(), post))
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту подписчика последние посты автора."""
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'pub_date')[:settings.TIMELINE_BACKFILL_LIMIT]
+    _bulk_insert(
+        TimelineEntry(user_id=user_id, post_id=post.pk,
+                      pub_date=post.pub_date)
+        for post in posts.iterator()
+    )
+
+
+def drop(user_id, author_id):
+    """Убрать из ленты подписчика все посты автора."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+@task
+def sync_follow(user_id, author_id):
+    """Привести ленту к текущему состоянию подписки на автора.
+
+    Задача ставится и при подписке, и при отписке: если они выполнятся
+    не по порядку, лента всё равно совпадёт с таблицей ``Follow``.
+    """
+    if user_id == author_id:
+        return
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        backfill(user_id, author_id)
+    else:
+        drop(user_id, author_id)
+
+
+def rebuild(user_id):
+    """Пересобрать ленту пользователя с нуля по текущим подпискам."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    for author_id in follow_graph.following(user_id):
+        if author_id != user_id:
+            backfill(user_id, author_id)
+
+
+def entries(user):
+    """Записи ленты подписок пользователя, новые сверху."""
+    return TimelineEntry.objects.filter(user=user).only(
+        'pub_date', 'post_id')
+
+
+def hydrate(entries):
+    """Заменить записи ленты самими постами, сохранив порядок."""
+    post_ids = [entry.post_id for entry in entries]
+    posts = Post.objects.select_related('author', 'group').in_bulk(post_ids)
+    return [posts[pk] for pk in post_ids if pk in posts]
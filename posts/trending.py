@@ -0,0 +1,123 @@
+"""Популярные посты и группы.
+
+Оценка — сумма событий с экспоненциальным затуханием: новый пост
+приносит ``TRENDING_POST_WEIGHT``, комментарий — единицу, и вклад
+события вдвое убывает за ``TRENDING_HALF_LIFE`` секунд. Группа
+получает вклады своих постов и комментариев к ним.
+
+Такая сумма обновляется инкрементально. Команда ``update_trending``
+(по расписанию, например раз в пять минут) умножает сохранённые оценки
+на общий множитель затухания с прошлого запуска и добавляет только
+события, появившиеся после него. Строка может закоммититься позже, чем
+проставлено её время, поэтому окно начинается на ``TRENDING_MARGIN``
+секунд раньше прошлого запуска, а события из перекрытия, уже учтённые
+тогда, отсеиваются по ``TrendingEvent``. Таблицы ``TrendingPost`` и
+``TrendingGroup`` обрезаются до ``TRENDING_KEEP`` строк, а страница
+«Популярное» читает из них готовый список, ничего не агрегируя.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import (Comment, Post, TrendingEvent, TrendingGroup,
+                     TrendingPost)
+
+
+def _decay(seconds):
+    return 0.5 ** (seconds / settings.TRENDING_HALF_LIFE)
+
+
+def _events(since, now):
+    """Вклады новых событий: ``({post_id: delta}, {group_id: delta})``.
+
+    События, которые попадут в перекрытие следующего окна, запоминаются
+    в ``TrendingEvent``; уже запомненные пропускаются.
+    """
+    posts, groups = defaultdict(float), defaultdict(float)
+    counted = set(TrendingEvent.objects.values_list('kind', 'object_id'))
+    recent = now - timedelta(seconds=settings.TRENDING_MARGIN)
+    seen = []
+    sources = (
+        ('post',
+         Post.objects.filter(pub_date__gt=since, pub_date__lte=now)
+         .values_list('pk', 'pk', 'group_id', 'pub_date'),
+         settings.TRENDING_POST_WEIGHT),
+        ('comment',
+         Comment.objects.filter(created__gt=since, created__lte=now)
+         .values_list('pk', 'post_id', 'post__group_id', 'created'),
+         1.0),
+    )
+    for kind, rows, weight in sources:
+        for pk, post_id, group_id, moment in rows.iterator():
+            if (kind, pk) in counted:
+                continue
+            if moment > recent:
+                seen.append(TrendingEvent(kind=kind, object_id=pk,
+                                          created=moment))
+            value = weight * _decay((now - moment).total_seconds())
+            posts[post_id] += value
+            if group_id is not None:
+                groups[group_id] += value
+    TrendingEvent.objects.filter(created__lte=recent).delete()
+    TrendingEvent.objects.bulk_create(
+        seen, batch_size=settings.TRENDING_BATCH_SIZE)
+    return posts, groups
+
+
+def _apply(model, deltas, factor, now):
+    model.objects.update(score=F('score') * factor, computed=now)
+    existing = model.objects.in_bulk(list(deltas))
+    for row in existing.values():
+        row.score += deltas[row.pk]
+    model.objects.bulk_update(existing.values(), ['score'],
+                              batch_size=settings.TRENDING_BATCH_SIZE)
+    model.objects.bulk_create(
+        [model(pk=pk, score=delta, computed=now)
+         for pk, delta in deltas.items() if pk not in existing],
+        batch_size=settings.TRENDING_BATCH_SIZE)
+    model.objects.filter(score__lt=settings.TRENDING_MIN_SCORE).delete()
+    border = model.objects.values_list('score', flat=True)[
+        settings.TRENDING_KEEP:settings.TRENDING_KEEP + 1]
+    if border:
+        model.objects.filter(score__lte=border[0]).delete()
+
+
+def update(rebuild=False):
+    """Обновить оценки; вернуть число затронутых постов и групп.
+
+    При первом запуске и с ``rebuild`` таблицы пересобираются по
+    событиям за последние ``TRENDING_WINDOW`` секунд.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        stamps = [model.objects.aggregate(last=Max('computed'))['last']
+                  for model in (TrendingPost, TrendingGroup)]
+        last = max(filter(None, stamps), default=None)
+        if rebuild or last is None:
+            TrendingPost.objects.all().delete()
+            TrendingGroup.objects.all().delete()
+            TrendingEvent.objects.all().delete()
+            since, factor = now - timedelta(
+                seconds=settings.TRENDING_WINDOW), 1.0
+        else:
+            since = last - timedelta(seconds=settings.TRENDING_MARGIN)
+            factor = _decay((now - last).total_seconds())
+        posts, groups = _events(since, now)
+        _apply(TrendingPost, posts, factor, now)
+        _apply(TrendingGroup, groups, factor, now)
+    return len(posts), len(groups)
+
+
+def top_posts():
+    rows = TrendingPost.objects.select_related(
+        'post__author', 'post__group')[:settings.TRENDING_POSTS]
+    return [row.post for row in rows]
+
+
+def top_groups():
+    return TrendingGroup.objects.select_related(
+        'group')[:settings.TRENDING_GROUPS]
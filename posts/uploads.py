@@ -0,0 +1,133 @@
+"""Обработка загруженных картинок постов.
+
+Загрузка пишется Django во временный файл, а не в память
+(``FILE_UPLOAD_HANDLERS``). Форма поста отклоняет слишком тяжёлый файл
+и проверяет размеры по заголовку (``validate``): пиксели при этом не
+декодируются.
+
+Тяжёлая часть — уменьшение, перекодирование в WebP и удаление EXIF —
+выполняется фоновой задачей ``process`` после коммита поста. Только
+после неё ставится генерация миниатюр, поэтому они строятся уже из
+уменьшенного файла. Один файл может принадлежать нескольким постам,
+поэтому запросы файлы не удаляют: ненужные убирает ``sweep``.
+"""
+import os
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+from sorl.thumbnail import delete as sorl_delete
+
+from . import thumbnails
+from .models import Post
+from .taskqueue import task
+
+
+def validate(upload):
+    """Проверить вес и число пикселей картинки, уже разобранной полем.
+
+    ``forms.ImageField`` открывает загрузку через Pillow и проверяет её
+    без декодирования пикселей, а размеры оставляет в ``upload.image``.
+    """
+    if upload.size > settings.UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            'Файл больше %(limit)s.', code='too_large',
+            params={'limit': filesizeformat(settings.UPLOAD_MAX_BYTES)})
+    width, height = upload.image.size
+    if width * height > settings.UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка больше %(limit)s мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': settings.UPLOAD_MAX_PIXELS // 10 ** 6})
+
+
+def _encode(source):
+    """WebP-версия картинки без EXIF или ``None``, если её не трогаем."""
+    with Image.open(source) as picture:
+        if getattr(picture, 'is_animated', False):
+            return None
+        picture = ImageOps.exif_transpose(picture)
+        side = settings.UPLOAD_MAX_SIDE
+        picture.thumbnail((side, side))
+        if picture.mode not in ('RGB', 'RGBA'):
+            has_alpha = (picture.mode in ('LA', 'PA')
+                         or 'transparency' in picture.info)
+            picture = picture.convert('RGBA' if has_alpha else 'RGB')
+        buffer = BytesIO()
+        # EXIF не передаётся в save и в новый файл не попадает.
+        picture.save(buffer, 'WEBP', quality=settings.UPLOAD_WEBP_QUALITY)
+    return buffer.getvalue()
+
+
+@task
+def process(post_id):
+    """Заменить картинку поста уменьшенной WebP-копией и готовить миниатюры."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    name = post.image.name
+    storage = post.image.storage
+    with storage.open(name, 'rb') as source:
+        content = _encode(source)
+    if content is not None:
+        stem = os.path.splitext(os.path.basename(name))[0]
+        new_name = storage.save(f'posts/{stem}.webp', ContentFile(content))
+        # Картинку могли заменить, пока файл перекодировался.
+        updated = Post.objects.filter(pk=post_id, image=name).update(
+            image=new_name, version=F('version') + 1)
+        if not updated:
+            return
+    thumbnails.generate.delay(post_id)
+
+
+def _files(storage, directory):
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield f'{directory}/{name}'
+    for name in directories:
+        yield from _files(storage, f'{directory}/{name}')
+
+
+def _stale(storage, name, border):
+    return storage.get_modified_time(name).timestamp() < border
+
+
+def sweep(grace=None):
+    """Удалить картинки постов, на которые никто не ссылается.
+
+    Одинаковые загрузки хранятся одним файлом (``yatube.storage``),
+    поэтому ссылки — посты с этим именем картинки. Файлы моложе
+    ``grace`` секунд (``MEDIA_SWEEP_GRACE``) не трогаются: их пост мог
+    ещё не сохраниться. Вернуть число удалённых файлов.
+    """
+    if grace is None:
+        grace = settings.MEDIA_SWEEP_GRACE
+    storage = default_storage
+    if not storage.exists('posts'):
+        return 0
+    border = time.time() - grace
+    deleted = 0
+    for name in _files(storage, 'posts'):
+        if (_stale(storage, name, border)
+                and not Post.objects.filter(image=name).exists()
+                # Повторная загрузка могла обновить файл после проверки.
+                and _stale(storage, name, border)):
+            sorl_delete(name)
+            deleted += 1
+    return deleted
+
+
+def schedule(post):
+    """Сбросить старую миниатюру и поставить обработку картинки в очередь."""
+    Post.objects.filter(pk=post.pk).update(
+        thumbnail='', version=F('version') + 1)
+    if post.image:
+        # Файл картинки должен быть сохранён до начала обработки.
+        transaction.on_commit(lambda: process.delay(post.pk))
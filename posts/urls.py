@@ -9,6 +9,15 @@ urlpatterns = [
     path('new/',
          views.new_post,
          name='new_post'),
+    path('explore/trending/',
+         views.trending_page,
+         name='trending'),
+    path('explore/viewer/',
+         views.viewer,
+         name='viewer'),
+    path('explore/search/',
+         views.search,
+         name='search'),
     path('group/<slug:slug>/',
          views.group_posts,
          name='group_posts'),
@@ -18,6 +27,9 @@ urlpatterns = [
     path('<str:username>/<int:post_id>/',
          views.post_view,
          name='post'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit,
          name='post_edit'),
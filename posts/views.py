@@ -1,31 +1,63 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.views.decorators.cache import cache_page
+from django.http import Http404, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import render, get_object_or_404
+from django.template.loader import render_to_string
 from django.shortcuts import redirect
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
 
-from .models import Post, Group, User, Comment, Follow
+from . import (follow_graph, fulltext, hot_groups, profiling,
+               recommendations, stats, timeline, trending, uploads,
+               write_queue)
+from .edge import shell_page
+from .watermarks import conditional
+from .cache import cached_page
+from .pagination import encode_cursor, keyset_slice, paginate
+from .models import Post, User, Follow
 from .forms import PostForm, CommentForm
 
 
-@cache_page(1, key_prefix= 'index_page')
+def _index_scopes(request):
+    return ['all', 'groups']
+
+
+def _group_scopes(request, slug):
+    return ['groups', f'group:{slug}']
+
+
+def _profile_scopes(request, username):
+    return ['groups', f'author:{username}']
+
+
+def _post_scopes(request, username, post_id):
+    return ['groups', f'author:{username}', f'post:{post_id}']
+
+
+@shell_page
+@conditional(_index_scopes)
+@cached_page(1, key_prefix='index_page')
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 8)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.select_related('author', 'group')
+    paginator, page = paginate(request, post_list, count_key='index')
     return render(request, 'index.html', {
         'page': page,
         'paginator': paginator,
     })
 
 
+@shell_page
+@conditional(_group_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, 8)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = hot_groups.group_by_slug(slug)
+    if group is None:
+        raise Http404
+    post_list = group.posts.select_related('author', 'group')
+    paginator, page = paginate(request, post_list,
+                               count_key=f'group:{group.pk}',
+                               hot=hot_groups.for_group(group.pk))
     return render(request, 'group.html', {
         'group': group,
         'page': page,
@@ -33,6 +65,23 @@ def group_posts(request, slug):
     })
 
 
+def trending_page(request):
+    return render(request, 'trending.html', {
+        'posts': trending.top_posts(),
+        'groups': trending.top_groups(),
+    })
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results, next_cursor = fulltext.find(query, request.GET.get('after'))
+    return render(request, 'search.html', {
+        'query': query,
+        'results': results,
+        'next_cursor': next_cursor,
+    })
+
+
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None,)
@@ -41,35 +90,102 @@ def new_post(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if post.image:
+        uploads.schedule(post)
     return redirect('index')
 
 
+@shell_page
+@conditional(_profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, 8)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    post_list = author.posts.select_related('author', 'group')
+    paginator, page = paginate(request, post_list,
+                               count_key=f'author:{author.pk}')
     following = (request.user.is_authenticated and
-                 author.following.filter(user=request.user).exists())
+                 follow_graph.is_following(request.user.pk, author.pk))
     return render(request, 'profile.html', {
         'page': page,
         'author': author,
+        'stats': stats.for_user(author),
         'paginator': paginator,
         'following': following,
+        'recommendations': (recommendations.for_user(author)
+                            if author == request.user else None),
     })
 
 
+@shell_page
+@conditional(_post_scopes)
 def post_view(request, username, post_id):
-    author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, author__username=username, pk=post_id)
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    post = get_object_or_404(Post.objects.select_related('author', 'group'),
+                             author__username=username, pk=post_id)
     form = CommentForm()
-    comments = post.comments.all()
+    comments, comments_next = _comment_page(
+        post, request.GET.get('comments_after'))
     return render(request, 'post.html', {
         'form': form,
         'author': author,
+        'stats': stats.for_user(author),
         'post': post,
-        'comments': comments
+        'comments': comments,
+        'comments_next': comments_next,
+    })
+
+
+@never_cache
+def viewer(request):
+    """Личные данные для оболочки страницы (см. ``posts.edge``).
+
+    ``?posts=`` — id постов страницы через запятую, ``?author=`` — имя
+    автора профиля. Анонимному отвечает пустым ``username``.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'username': None})
+    ids = [int(value) for value in request.GET.get('posts', '').split(',')
+           if value.isdigit()][:settings.EDGE_VIEWER_MAX_POSTS]
+    own = Post.objects.filter(author=request.user, pk__in=ids)
+    author = User.objects.filter(
+        username=request.GET.get('author', '')).values_list(
+        'pk', flat=True).first()
+    return JsonResponse({
+        'username': request.user.username,
+        'csrf_token': get_token(request),
+        'editable': {
+            post_id: reverse('post_edit',
+                             args=[request.user.username, post_id])
+            for post_id in own.values_list('pk', flat=True)
+        },
+        'following': (author is not None and follow_graph.is_following(
+            request.user.pk, author)),
+    })
+
+
+def _comment_page(post, cursor):
+    """Страница комментариев поста (новые первыми) и курсор следующей."""
+    per_page = settings.COMMENTS_PER_PAGE
+    comments, number = keyset_slice(
+        post.comments.select_related('author'), cursor, per_page,
+        date_field='created')
+    next_cursor = None
+    if (len(comments) == per_page
+            and post.comment_count > number * per_page):
+        last = comments[per_page - 1]
+        next_cursor = encode_cursor(last.created, last.pk, number)
+    return comments, next_cursor
+
+
+def post_comments(request, username, post_id):
+    post = get_object_or_404(Post.objects.only('comment_count'),
+                             author__username=username, pk=post_id)
+    comments, next_cursor = _comment_page(post, request.GET.get('after'))
+    return JsonResponse({
+        'html': render_to_string('comment_list.html',
+                                 {'comments': comments}, request),
+        'next': next_cursor,
     })
 
 
@@ -85,7 +201,9 @@ def post_edit(request, username, post_id):
             'form': form,
             'post': post,
         })
-    form.save()
+    post = form.save()
+    if 'image' in form.changed_data:
+        uploads.schedule(post)
     return redirect('post', username=username, post_id=post_id)
 
 
@@ -109,19 +227,20 @@ def add_comment(request, username, post_id):
     comment = form.save(commit=False)
     comment.post = post
     comment.author = request.user
-    comment.save()
+    write_queue.submit(comment.save)
     return redirect('post', username, post_id)
 
 
 @login_required
 def follow_index(request):
-    post = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post, 8)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    entries = timeline.entries(request.user)
+    paginator, page = paginate(request, entries, pk_field='post_id',
+                               count_key=f'timeline:{request.user.pk}')
+    page.object_list = timeline.hydrate(page.object_list)
     return render(request, 'follow.html', {
         'page': page,
-        'paginator': paginator}
+        'paginator': paginator,
+        'recommendations': recommendations.for_user(request.user)}
     )
 
 
@@ -130,7 +249,8 @@ def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user and not Follow.objects.filter(
         user=request.user, author=author).exists():
-        Follow.objects.get_or_create(user=request.user, author=author)
+        write_queue.submit(Follow.objects.get_or_create,
+                           user=request.user, author=author)
     return redirect('profile', username=username)
 
 
@@ -138,5 +258,16 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     follow = get_object_or_404(Follow, author=author, user=request.user)
-    follow.delete()
+    write_queue.submit(follow.delete)
     return redirect('profile', username=username)
+
+
+@staff_member_required
+def perf_stats(request):
+    rows = profiling.summary()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'views': rows})
+    return render(request, 'perf.html', {
+        'rows': rows,
+        'sample_rate': settings.PERF_SAMPLE_RATE,
+    })
@@ -0,0 +1,117 @@
+"""Водяные знаки для условных GET-запросов (ETag / Last-Modified).
+
+Для каждой области — вся лента (``all``), группа, автор, пост и
+названия групп (``groups``) — в кэше хранится время последнего
+изменения. Сигналы сдвигают его при любой записи, которая меняет
+страницу, а ``conditional`` по нему отвечает 304 ещё до запросов ленты
+и рендеринга шаблона. Если значения в кэше нет, оно считается равным
+текущему времени: после вытеснения клиенты один раз получат страницу
+заново. Области берутся из адреса (в том числе несуществующие имена),
+поэтому ключ — хеш области, а живёт он ``WATERMARKS_TIMEOUT`` секунд.
+
+Знаки должны быть видны всем процессам, иначе воркер, сдвинувший знак
+у себя, не помешает остальным отвечать 304. Поэтому с кэшем в памяти
+процесса они выключены (``WATERMARKS_ENABLED``). Страница, область
+которой менялась последние ``REPLICA_STICKY_SECONDS`` секунд, читается
+с основной базы: отстающая реплика не отдаст старые данные под новым
+ETag, который потом закрепят браузер и прокси.
+"""
+import time
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.conf import settings
+from django.views.decorators.http import condition
+
+from yatube import replicas
+
+from .cache import get_cache, is_shared
+
+
+def _key(scope):
+    return f'watermark:{md5(scope.encode()).hexdigest()}'
+
+
+def post_scopes(post_id, username, group_slug):
+    """Области, страницы которых показывают карточку поста.
+
+    Автор и группа задаются именем и slug из адреса страницы, чтобы
+    view проверяли водяные знаки без запросов к базе.
+    """
+    scopes = ['all', f'author:{username}', f'post:{post_id}']
+    if group_slug is not None:
+        scopes.append(f'group:{group_slug}')
+    return scopes
+
+
+def enabled():
+    if settings.WATERMARKS_ENABLED is None:
+        return is_shared()
+    return settings.WATERMARKS_ENABLED
+
+
+def touch(*scopes):
+    """Отметить, что страницы ``scopes`` изменились."""
+    if not enabled():
+        return
+    now = time.time()
+    get_cache().set_many({_key(scope): now for scope in scopes},
+                         settings.WATERMARKS_TIMEOUT)
+
+
+def stamps(scopes):
+    """Время последнего изменения каждой области."""
+    cache = get_cache()
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            cache.add(key, now, settings.WATERMARKS_TIMEOUT)
+            found[key] = cache.get(key, now)
+    return [found[key] for key in keys]
+
+
+def _request_stamps(request, scopes_func, args, kwargs):
+    # condition() вызывает функции ETag и Last-Modified по очереди:
+    # области и их значения считаются один раз на запрос.
+    if not hasattr(request, '_watermarks'):
+        scopes = None
+        if enabled():
+            scopes = scopes_func(request, *args, **kwargs)
+        request._watermarks = None if scopes is None else stamps(scopes)
+        if request._watermarks and (
+                max(request._watermarks)
+                > time.time() - settings.REPLICA_STICKY_SECONDS):
+            replicas.read_primary()
+    return request._watermarks
+
+
+def conditional(scopes_func, per_viewer=True):
+    """Декоратор view: ETag и Last-Modified по водяным знакам областей.
+
+    ``scopes_func(request, *args, **kwargs)`` возвращает список
+    областей страницы или ``None``, если валидаторов нет (например,
+    объекта не существует). Страница по умолчанию зависит от
+    пользователя, поэтому он входит в ETag вместе с секретом CSRF: после
+    нового входа в страницах с формами другой токен. Для ответов,
+    одинаковых для всех (API), — ``per_viewer=False``.
+    """
+    def etag(request, *args, **kwargs):
+        values = _request_stamps(request, scopes_func, args, kwargs)
+        if values is None:
+            return None
+        viewer = ['0']
+        if per_viewer and request.user.is_authenticated:
+            viewer = [str(request.user.pk),
+                      request.META.get('CSRF_COOKIE', '')]
+        raw = '|'.join(viewer + [repr(value) for value in values])
+        return md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        values = _request_stamps(request, scopes_func, args, kwargs)
+        if not values:
+            return None
+        return datetime.fromtimestamp(max(values), tz=timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,89 @@
+"""Очередь мелких записей внутри процесса.
+
+SQLite допускает одного писателя: при множестве одновременных
+комментариев и подписок каждый запрос ждёт блокировку и коммитит
+отдельно. С ``WRITE_QUEUE_ENABLED`` такие записи передаются одному
+потоку-писателю, который собирает их в пачку (до
+``WRITE_QUEUE_MAX_BATCH`` штук или ``WRITE_QUEUE_MAX_DELAY`` секунд) и
+выполняет в одной транзакции, каждую в своей точке сохранения. Запрос
+ждёт коммита пачки и получает результат своей функции или её
+исключение, поэтому для view поведение не отличается от записи на месте.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def submit(func, *args, **kwargs):
+    """Выполнить ``func(*args, **kwargs)`` в пачке записи и вернуть результат.
+
+    Без очереди, а также внутри уже открытой транзакции (её блокировку
+    держит вызывающий поток) функция выполняется сразу.
+    """
+    if (not settings.WRITE_QUEUE_ENABLED
+            or transaction.get_connection().in_atomic_block):
+        return func(*args, **kwargs)
+    _ensure_writer()
+    future = Future()
+    _queue.put((future, func, args, kwargs))
+    return future.result()
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(
+                target=_run, name='write-queue', daemon=True)
+            _writer.start()
+
+
+def _next_batch():
+    batch = [_queue.get()]
+    deadline = time.monotonic() + settings.WRITE_QUEUE_MAX_DELAY
+    while len(batch) < settings.WRITE_QUEUE_MAX_BATCH:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=timeout))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run():
+    while True:
+        write(_next_batch())
+
+
+def write(batch):
+    """Выполнить пачку ``(future, func, args, kwargs)`` одной транзакцией."""
+    close_old_connections()
+    results = []
+    try:
+        with transaction.atomic():
+            for future, func, args, kwargs in batch:
+                try:
+                    with transaction.atomic():
+                        results.append((future, func(*args, **kwargs), None))
+                except Exception as error:
+                    results.append((future, None, error))
+    except Exception as error:
+        # Не удался сам коммит: ни одна запись пачки не сохранена.
+        for future, *_ in batch:
+            future.set_exception(error)
+        return
+    for future, result, error in results:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
@@ -0,0 +1,69 @@
+"""Чтение с реплик базы данных.
+
+``ReplicaMiddleware`` для GET-запросов к view из ``REPLICA_VIEWS``
+выбирает одну из ``REPLICA_DATABASES``, и ``ReplicaRouter`` до конца
+запроса направляет туда чтение. Запись всегда идёт в ``default``.
+После успешного изменяющего запроса пользователь получает cookie
+``REPLICA_STICKY_COOKIE`` и ``REPLICA_STICKY_SECONDS`` секунд читает
+с основной базы, чтобы видеть свой пост или комментарий, даже если
+реплика отстаёт.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = threading.local()
+
+
+def current_replica():
+    return getattr(_state, 'replica', None)
+
+
+def read_primary():
+    """До конца запроса читать с основной базы."""
+    _state.replica = None
+
+
+class ReplicaRouter:
+    # Сессии пишутся почти на каждый вход, их читаем только с default.
+    primary_only_apps = ('sessions',)
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in self.primary_only_apps:
+            return 'default'
+        return current_replica()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.replica = None
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (settings.REPLICA_DATABASES
+                and request.method in SAFE_METHODS
+                and request.resolver_match.url_name in settings.REPLICA_VIEWS
+                and settings.REPLICA_STICKY_COOKIE not in request.COOKIES):
+            _state.replica = random.choice(settings.REPLICA_DATABASES)
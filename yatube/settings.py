@@ -38,6 +38,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'users',
     'posts',
+    'api',
     'django.contrib.sites',
     'django.contrib.flatpages',
     'django.contrib.admin',
@@ -51,12 +52,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'posts.middleware.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yatube.replicas.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -65,7 +68,8 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Бэкенд Django с замером времени рендеринга (posts/profiling.py)
+        'BACKEND': 'posts.profiling.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,13 +90,67 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Соединения переиспользуются между запросами CONN_MAX_AGE секунд.
+# Реплики для чтения перечисляются через запятую в YATUBE_DB_REPLICAS
+# (локально это могут быть копии db.sqlite3: sqlite3 db.sqlite3
+# ".backup replica.sqlite3"); в тестах они зеркалят default.
+CONN_MAX_AGE = int(os.environ.get('YATUBE_DB_CONN_MAX_AGE', 60))
+
+# yatube.sqlite — SQLite с WAL, настроенными PRAGMA и BEGIN IMMEDIATE
+# (см. yatube/sqlite/__init__.py); timeout — сколько секунд ждать
+# блокировку записи
+SQLITE_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'OPTIONS': SQLITE_OPTIONS,
     }
 }
 
+REPLICA_DATABASES = []
+for number, name in enumerate(
+        filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')),
+        start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'yatube.sqlite',
+        'NAME': name,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'OPTIONS': SQLITE_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['yatube.replicas.ReplicaRouter']
+
+# Очередь мелких записей (posts/write_queue.py): комментарии и подписки
+# одного процесса пишутся пачками до MAX_BATCH штук, собранными за
+# MAX_DELAY секунд, в одной транзакции
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_MAX_BATCH = 50
+WRITE_QUEUE_MAX_DELAY = 0.005
+
+# Какие view читают с реплик (по имени URL) и сколько секунд после
+# записи пользователь читает с основной базы, чтобы видеть свои изменения
+REPLICA_VIEWS = (
+    'index', 'group_posts', 'profile', 'post', 'post_comments',
+    'follow_index',
+)
+REPLICA_STICKY_COOKIE = 'read_primary'
+REPLICA_STICKY_SECONDS = 10
+
+# Водяные знаки для ETag/Last-Modified (posts/watermarks.py). None —
+# включены, только если кэш POSTS_CACHE_ALIAS общий для всех процессов;
+# сколько секунд хранится знак области
+WATERMARKS_ENABLED = None
+WATERMARKS_TIMEOUT = 24 * 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -136,6 +194,12 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Медиафайлы называются по хешу содержимого (yatube/storage.py).
+# Миниатюры sorl.thumbnail уже называются по хешу исходника и пишутся
+# обычным хранилищем
+DEFAULT_FILE_STORAGE = 'yatube.storage.ContentAddressedStorage'
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+
 # Login
 
 LOGIN_URL = "/auth/login/"
@@ -150,8 +214,146 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 # Идентификатор текущего сайта
 SITE_ID = 2
 
+# Бэкенд кэша задаётся окружением, чтобы воркеры могли делить один кэш:
+# локально, например, django.core.cache.backends.filebased.FileBasedCache
+# с каталогом в LOCATION или django.core.cache.backends.db.DatabaseCache
+# с таблицей (manage.py createcachetable), в продакшене — memcached/redis.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.environ.get(
+            'YATUBE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('YATUBE_CACHE_LOCATION', ''),
     }
 }
+
+# Кэш приложения posts (posts/cache.py): алиас из CACHES, сколько секунд
+# отдавать устаревшее значение во время пересчёта, время жизни блокировки
+# пересчёта, период опроса кэша при её ожидании и пересчитывать ли
+# устаревшее значение в фоновом потоке, не задерживая запрос
+POSTS_CACHE_ALIAS = 'default'
+POSTS_CACHE_STALE_TIMEOUT = 30
+POSTS_CACHE_LOCK_TIMEOUT = 10
+POSTS_CACHE_POLL_INTERVAL = 0.05
+POSTS_CACHE_BACKGROUND_REFRESH = True
+
+# Лента подписок: размер пачки при раскладке поста по лентам
+# и сколько последних постов автора копировать при подписке
+TIMELINE_BATCH_SIZE = 500
+TIMELINE_BACKFILL_LIMIT = 1000
+
+# Пагинация лент: постов на странице, показывать ли номера страниц
+# по примерному (кэшируемому) количеству и сколько секунд его хранить,
+# до какого номера страницы открываются через OFFSET (?page=N)
+POSTS_PER_PAGE = 8
+PAGINATOR_ESTIMATE_COUNT = True
+PAGINATOR_COUNT_TIMEOUT = 60
+PAGINATOR_MAX_PAGE = 10
+
+# Горячие страницы групп (posts/hot_groups.py): сколько первых постов
+# группы держать в кэше по порядку, сколько секунд хранить этот список
+# и сколько секунд кэшировать группу. None — списки включены, только
+# если кэш POSTS_CACHE_ALIAS общий для всех процессов
+GROUP_HOT_ENABLED = None
+GROUP_HOT_SIZE = 100
+GROUP_HOT_TIMEOUT = 60 * 60
+GROUP_CACHE_TIMEOUT = 300
+
+# Граф подписок в памяти (posts/follow_graph.py): сколько секунд правки
+# хранятся в кэше для других процессов и сколько пропущенных правок
+# применять, прежде чем загрузить граф заново
+FOLLOW_GRAPH_LOG_TIMEOUT = 60 * 60
+FOLLOW_GRAPH_MAX_REPLAY = 1000
+# None — граф включён, только если кэш POSTS_CACHE_ALIAS общий для всех
+# процессов; иначе подписки читаются из базы
+FOLLOW_GRAPH_ENABLED = None
+
+# Рекомендации «на кого подписаться» (posts/recommendations.py, команда
+# recommend): сколько хранить на пользователя, по скольку пользователей
+# считать за раз, со сколькими самыми похожими пользователями сравнивать
+# подписки и веса друзей друзей и совместных подписок
+RECOMMENDATIONS_TOP_K = 10
+RECOMMENDATIONS_BLOCK_SIZE = 500
+RECOMMENDATIONS_SIMILAR_USERS = 50
+RECOMMENDATIONS_FOF_WEIGHT = 1.0
+RECOMMENDATIONS_COFOLLOW_WEIGHT = 1.0
+
+# «Популярное» (posts/trending.py, команда update_trending по
+# расписанию): за сколько секунд вклад события убывает вдвое, вес поста
+# относительно комментария, окно пересборки, на сколько секунд окно
+# запуска захватывает предыдущее, сколько строк хранить и показывать и
+# ниже какой оценки строка удаляется
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_POST_WEIGHT = 3.0
+TRENDING_WINDOW = 7 * 24 * 60 * 60
+TRENDING_MARGIN = 10 * 60
+TRENDING_KEEP = 1000
+TRENDING_MIN_SCORE = 0.01
+TRENDING_BATCH_SIZE = 500
+TRENDING_POSTS = 20
+TRENDING_GROUPS = 10
+
+# Комментариев на странице поста; более старые подгружаются по курсору
+COMMENTS_PER_PAGE = 20
+
+# Анонимные страницы для кэша на границе (posts/edge.py): сколько секунд
+# прокси хранит оболочку и о скольких постах страницы отвечает
+# explore/viewer/ (view ``viewer``)
+EDGE_CACHE_TIMEOUT = 60
+EDGE_VIEWER_MAX_POSTS = 100
+
+# API для чтения (api/): объектов на странице по умолчанию и максимум
+# для ?limit=, сколько строк читать из базы за раз при выгрузке NDJSON
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+API_EXPORT_CHUNK_SIZE = 2000
+# Сколько имён принимает пакетная подписка POST /api/follows/, по
+# сколько пар пишет команда import_follows и по скольку авторов одного
+# подписчика удаляет follows.unfollow_many
+API_FOLLOW_BATCH_LIMIT = 1000
+FOLLOW_IMPORT_CHUNK_SIZE = 5000
+FOLLOW_DELETE_CHUNK_SIZE = 500
+
+# Загрузки пишутся во временный файл, а не в память. Картинки постов
+# (posts/uploads.py): предельный вес файла и число пикселей, длинная
+# сторона после уменьшения и качество WebP
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+UPLOAD_MAX_PIXELS = 40 * 10 ** 6
+UPLOAD_MAX_SIDE = 2048
+UPLOAD_WEBP_QUALITY = 80
+# Сколько секунд файл картинки без ссылок живёт до уборки (manage.py
+# sweep_media): пост с повторной загрузкой мог ещё не сохраниться
+MEDIA_SWEEP_GRACE = 24 * 60 * 60
+
+# Миниатюры картинок постов, которые готовятся заранее фоновой задачей
+# (posts/thumbnails.py)
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+# Очередь фоновых задач (posts/taskqueue.py, воркер — manage.py run_tasks):
+# выполнять ли задачи сразу в запросе (YATUBE_TASKS_ALWAYS_EAGER=0 там,
+# где запущен воркер), число попыток, задержка первого повтора, через
+# сколько секунд задача зависшего воркера возвращается в очередь, период
+# опроса очереди и сколько хранить выполненные задачи
+TASKS_ALWAYS_EAGER = os.environ.get('YATUBE_TASKS_ALWAYS_EAGER', '1') == '1'
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_LOCK_TIMEOUT = 300
+TASKS_POLL_INTERVAL = 1
+TASKS_KEEP_DONE = 24 * 60 * 60
+
+# Полнотекстовый поиск (posts/fulltext.py): хранилище индекса и сколько
+# совпадений подставлять в поиск админки
+SEARCH_BACKEND = 'posts.fulltext.SqliteFtsBackend'
+SEARCH_ADMIN_LIMIT = 1000
+
+# Профилирование запросов (posts/middleware.py): доля замеряемых
+# запросов, сколько последних замеров хранить для /admin/perf/ и
+# отдавать ли Server-Timing всем, а не только сотрудникам
+PERF_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+PERF_BUFFER_SIZE = 2000
+PERF_SERVER_TIMING = False
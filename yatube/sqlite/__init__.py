@@ -0,0 +1,13 @@
+"""Бэкенд SQLite для продакшена: WAL, настроенные PRAGMA и BEGIN IMMEDIATE.
+
+Подключается как ``'ENGINE': 'yatube.sqlite'``. Дополнительные ключи
+``OPTIONS``:
+
+* ``pragmas`` — словарь PRAGMA поверх ``DatabaseWrapper.pragmas``;
+* ``transaction_mode`` — как начинать транзакции: ``DEFERRED``
+  (поведение Django), ``IMMEDIATE`` или ``EXCLUSIVE``.
+
+С ``IMMEDIATE`` транзакция сразу берёт блокировку записи и при занятой
+базе ждёт её ``timeout`` секунд. Отложенная транзакция в той же
+ситуации падает с «database is locked» при первой записи, не дожидаясь.
+"""
@@ -0,0 +1,36 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pragmas = {
+        'journal_mode': 'WAL',
+        # В режиме WAL NORMAL не теряет целостность, только последние
+        # транзакции при отключении питания.
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    transaction_mode = 'IMMEDIATE'
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**self.pragmas, **kwargs.pop('pragmas', {})}
+        mode = kwargs.pop('transaction_mode', self.transaction_mode).upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'Неизвестный transaction_mode для SQLite: {mode}')
+        self.transaction_mode = mode
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
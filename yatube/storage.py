@@ -0,0 +1,63 @@
+"""Хранилище медиафайлов с адресацией по содержимому.
+
+``ContentAddressedStorage`` сохраняет файл под именем из SHA-256 его
+содержимого: ``posts/ab/cdef….jpg``. Одинаковые загрузки получают одно
+имя, и второй раз файл не пишется, а миниатюры sorl.thumbnail, которые
+привязаны к имени исходника, становятся общими для всех постов с этой
+картинкой. Файл по такому имени никогда не меняется, поэтому ``serve``
+отдаёт его с ``Cache-Control: immutable`` на год.
+
+Файлы не удаляются из запросов: между проверкой «на файл никто не
+ссылается» и удалением одинаковая загрузка могла получить то же имя.
+Ненужные файлы убирает периодическая команда ``sweep_media``
+(``posts.uploads.sweep``), а повторная загрузка обновляет время
+изменения файла, чтобы тот не попал под уборку, пока её пост ещё не
+сохранён.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.cache import patch_cache_control
+from django.views.static import serve as static_serve
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Имена по хешу: наши (SHA-256) и миниатюры sorl.thumbnail (MD5).
+_HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{32,}\.\w+$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def content_name(self, name, content):
+        """Имя файла по хешу содержимого в каталоге исходного имени."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:] + extension).replace('\\', '/')
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        # При гонке двух одинаковых загрузок FileSystemStorage сохранит
+        # вторую под именем с суффиксом — дубль, но не ошибка.
+        return super()._save(name, content)
+
+
+def is_immutable(name):
+    return bool(_HASHED_NAME.search(name))
+
+
+def serve(request, path, document_root=None, show_indexes=False):
+    """``django.views.static.serve`` с вечным кэшем для имён по хешу."""
+    response = static_serve(request, path, document_root, show_indexes)
+    if response.status_code == 200 and is_immutable(path):
+        patch_cache_control(response, public=True, immutable=True,
+                            max_age=IMMUTABLE_MAX_AGE)
+    return response
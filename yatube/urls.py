@@ -5,6 +5,9 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from posts.views import perf_stats
+from yatube import storage
+
 
 handler404 = "posts.views.page_not_found" # noqa
 handler500 = "posts.views.server_error" # noqa
@@ -13,6 +16,7 @@ handler500 = "posts.views.server_error" # noqa
 urlpatterns = [
     path("auth/", include("users.urls")),
     path("auth/", include("django.contrib.auth.urls")),
+    path("admin/perf/", perf_stats, name="perf_stats"),
     path("admin/", admin.site.urls),
     path('about/', include('django.contrib.flatpages.urls')),
 
@@ -34,11 +38,12 @@ urlpatterns += [
 ]
 
 urlpatterns += [
+    path("api/", include("api.urls")),
     path("", include("posts.urls")),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL,
+    urlpatterns += static(settings.MEDIA_URL, view=storage.serve,
                           document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)